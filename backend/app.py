@@ -1,13 +1,29 @@
 # backend/app.py
-from flask import Flask, request, jsonify, send_from_directory
-from collectors.sample_collector import collect_local_samples
-from extractors.entities import extract
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from collectors.sample_index import get_sample_index, public_sample, sample_index_loaded, search_local_samples
+from extractors.cache import cached_extract_many, get_extraction_cache
+from extractors.entities import EXTRACTOR_VERSION, get_nlp, model_loaded
 from utils.scorer import score_entity
+from utils.dataset_index import FrameIndex
+from utils.multimatch import AhoCorasick
+from utils.snapshot import load_dataset
+from utils.result_cache import ProfileCache
+from utils.report_jobs import ReportQueue
+from utils.entity_graph import EntityGraph
+from utils.fuzzy_index import HandleIndex
+from utils.rollups import Rollups, KINDS as ROLLUP_KINDS
+from utils.warmup import Registry
+from utils.sqlite_store import SqliteStore, StoreFrameIndex, StoreRollups, CHUNK_ROWS as STORE_CHUNK_ROWS
+from utils import metrics, payload, shared_data
 import os
 import hashlib
-from fpdf import FPDF
+import itertools
 import pandas as pd
+import numpy as np
 import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 app = Flask(__name__, static_folder='../frontend/dist', template_folder='templates')
 
@@ -15,48 +31,481 @@ app = Flask(__name__, static_folder='../frontend/dist', template_folder='templat
 # Config / dataset paths
 # ----------------------------
 BASE = os.path.dirname(__file__) or "."
-DATA_DIR = os.path.join(BASE, "data")
+DATA_DIR = os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE, "data")
 KAGGLE_PATH = os.path.join(DATA_DIR, "Data_Breaches_EN_V2_2004_2017_20180220.csv")
 PERSON_PATH = os.path.join(DATA_DIR, "person_breaches.csv")  # optional synthetic person dataset
 PERSON_DUMMY_PATH = os.path.join(DATA_DIR, "dummy_person_breaches.csv")  # alternative
 ACTOR_PATH = os.path.join(DATA_DIR, "dummy_actor_intelligence.csv")     # actor intelligence
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILER_CACHE_TTL", "300"))                     # seconds
+PROFILE_CACHE_MAX_BYTES = int(os.environ.get("PROFILER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ENTITY_GRAPH_PATH = os.path.join(DATA_DIR, "entity_graph.pkl")  # persisted correlation graph
+ROLLUPS_PATH = os.path.join(DATA_DIR, "rollups.pkl")  # persisted per-entity rollups
+RESPONSE_ROW_LIMIT = int(os.environ.get("PROFILER_RESPONSE_ROW_LIMIT", "0"))  # breach/actor rows per response (0 = all); scores always use every match
+REPORT_WORKERS = int(os.environ.get("PROFILER_REPORT_WORKERS", "2"))
+REPORT_WAIT_TIMEOUT = 60.0  # max seconds a request blocks on a report job
+FUZZY_THRESHOLD = float(os.environ.get("PROFILER_FUZZY_THRESHOLD", "0.5"))  # min 3-gram Jaccard for fuzzy=true near-matches
+FUZZY_LIMIT = 25  # near-matches returned per query
+DATA_BACKEND = os.environ.get("PROFILER_BACKEND", "memory")  # memory | sqlite (on-disk store for datasets larger than RAM)
+if DATA_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(f"PROFILER_BACKEND must be 'memory' or 'sqlite', not {DATA_BACKEND!r}")
+STORE_PATH = os.environ.get("PROFILER_STORE_PATH") or os.path.join(DATA_DIR, "datasets.sqlite")  # PROFILER_BACKEND=sqlite
+SHARED_DATA = os.environ.get("PROFILER_SHARED_DATA", "0") == "1" and DATA_BACKEND == "memory"  # map datasets from a shared Arrow generation (multi-worker)
+SHARED_CHECK_INTERVAL = 2.0  # seconds between checks for a newer shared generation
+EXTRACT_PROCESSES = int(os.environ.get("PROFILER_EXTRACT_PROCESSES", "1"))  # spaCy workers for uncached hits (-1 = all cores)
+PRELOAD = os.environ.get("PROFILER_PRELOAD", "")  # "1": warm up in the background at import (WSGI servers), "0": never, unset: under `python app.py` only
 
 # ----------------------------
 # Load datasets (if available)
 # ----------------------------
-df_breaches = None
-for path in (KAGGLE_PATH,):
-    if os.path.exists(path):
-        try:
-            # CSV from Kaggle may use semicolon or comma; try both robustly
+# Datasets are loaded on first use or by the warm-up (see "Warm-up" below).
+# Each CSV is parsed once and cached as a typed, memory-mappable snapshot under
+# data/snapshots (see utils/snapshot.py); later starts load the snapshot unless
+# the CSV has changed.
+def read_breaches_csv(path):
+    # CSV from Kaggle may use semicolon or comma; try both robustly
+    try:
+        return pd.read_csv(path, sep=';', encoding='utf-8', on_bad_lines='skip')
+    except Exception:
+        return pd.read_csv(path, sep=',', encoding='utf-8', on_bad_lines='skip')
+
+# identifier columns stay text: read_csv would parse "+919876543210" as an int,
+# dropping the '+' (and leading zeros) and turning the phone into a number
+IDENTIFIER_DTYPES = {'email': str, 'username': str, 'phone': str}
+CSV_READER_VERSION = 2  # bump when parsing changes, so stores / saved graphs keyed on file_signature rebuild
+
+def read_dataset_csv(path, **kwargs):
+    return pd.read_csv(path, dtype=IDENTIFIER_DTYPES, **kwargs)
+
+def timed_load(name, path, reader):
+    """load_dataset + start-up gauges for /metrics"""
+    start = time.perf_counter()
+    df = load_dataset(path, reader)
+    metrics.set_gauge('profiler_dataset_load_seconds', round(time.perf_counter() - start, 6), dataset=name)
+    metrics.set_gauge('profiler_dataset_rows', len(df), dataset=name)
+    return df
+
+def load_frames():
+    """Load every available dataset -> {'breaches', 'person', 'actor'} (None when missing)."""
+    df_breaches = None
+    for path in (KAGGLE_PATH,):
+        if os.path.exists(path):
+            try:
+                df_breaches = timed_load('breaches', path, read_breaches_csv)
+                print(f"[+] Loaded breaches dataset: {len(df_breaches)} rows from {path}")
+                break
+            except Exception as e:
+                print("[!] Failed loading breaches CSV:", e)
+
+    # Load person dataset (prefer explicit path if present)
+    person_df = None
+    for p in (PERSON_PATH, PERSON_DUMMY_PATH):
+        if os.path.exists(p):
             try:
-                df_breaches = pd.read_csv(path, sep=';', encoding='utf-8', on_bad_lines='skip')
-            except Exception:
-                df_breaches = pd.read_csv(path, sep=',', encoding='utf-8', on_bad_lines='skip')
-            print(f"[+] Loaded breaches dataset: {len(df_breaches)} rows from {path}")
-            break
+                person_df = timed_load('person', p, read_dataset_csv)
+                print(f"[+] Loaded person dataset: {len(person_df)} rows from {p}")
+                break
+            except Exception as e:
+                print("[!] Failed loading person dataset:", e)
+
+    # Load actor intelligence dataset
+    actor_df = None
+    if os.path.exists(ACTOR_PATH):
+        try:
+            actor_df = timed_load('actor', ACTOR_PATH, read_dataset_csv)
+            print(f"[+] Loaded actor intelligence dataset: {len(actor_df)} rows")
         except Exception as e:
-            print("[!] Failed loading breaches CSV:", e)
+            print("[!] Failed loading actor dataset:", e)
+    return {'breaches': df_breaches, 'person': person_df, 'actor': actor_df}
+
+DATASET_NAMES = ('breaches', 'person', 'actor')
+
+def dataset_source(name):
+    """CSV a dataset is loaded from (first existing candidate), or None."""
+    candidates = {'breaches': (KAGGLE_PATH,), 'person': (PERSON_PATH, PERSON_DUMMY_PATH), 'actor': (ACTOR_PATH,)}
+    return next((p for p in candidates[name] if os.path.exists(p)), None)
+
+# Identifies the loaded CSVs; part of the result-cache key together with the
+# sample store version, so cached profiles never outlive the data they came from.
+def file_signature(path):
+    try:
+        st = os.stat(path)
+        return f"{path}:{st.st_mtime_ns}:{st.st_size}:r{CSV_READER_VERSION}"
+    except OSError:
+        return f"{path}:-"
+
+def datasets_signature():
+    return hashlib.sha1("|".join(
+        file_signature(p) for p in (KAGGLE_PATH, PERSON_PATH, PERSON_DUMMY_PATH, ACTOR_PATH)
+    ).encode('utf-8')).hexdigest()[:12]
+
+def dataset_version():
+    return f"{get_datasets().version}:{get_sample_index().version}"
+
+profile_cache = ProfileCache(ttl=PROFILE_CACHE_TTL, max_bytes=PROFILE_CACHE_MAX_BYTES)
+report_queue = ReportQueue(DATA_DIR, workers=REPORT_WORKERS)
+
+# ----------------------------
+# Lookup indexes (built once; lowercased values, exact maps and n-gram postings)
+# ----------------------------
+def breach_search_columns(df):
+    """Entity / alternative-name columns of the breaches dataset (None if absent)."""
+    entity_col = None
+    alt_col = None
+    for c in df.columns:
+        if 'entity' in c.lower():
+            entity_col = c
+        if 'alternative' in c.lower() or 'alt' in c.lower():
+            alt_col = c
+    return entity_col, alt_col
+
+def search_columns(name, df):
+    """(columns, exact-match columns) indexed for a dataset."""
+    if name == 'breaches':
+        return [c for c in breach_search_columns(df) if c is not None], []
+    if name == 'person':
+        return ['email', 'username'], ['email']
+    return ['email', 'username'], []
+
+# approximate index over usernames / email local parts, for fuzzy=true
+# (MinHash + LSH, see utils/fuzzy_index.py)
+def build_handle_index(d):
+    idx = HandleIndex(threshold=FUZZY_THRESHOLD)
+    for name in ('person', 'actor'):
+        if getattr(d, name) is not None:
+            # column by column, so handles are numbered in the same order however the rows are chunked
+            for col in ('username', 'email'):
+                for df in d.chunks(name):
+                    idx.add_frame(df, name, columns=(col,))
+    return idx.build()
+
+# per-entity rollups (see utils/rollups.py), kept up to date with appended CSV rows
+def rollup_keys(name, df):
+    if name == 'breaches':
+        entity_col = breach_search_columns(df)[0]
+        return {'organization': entity_col} if entity_col else {}
+    return {'email': 'email', 'username': 'username'}
+
+_rollups_lock = threading.Lock()
+
+def sync_rollups(d):
+    """
+    Saved rollups plus any rows appended to the CSVs since they were saved;
+    rebuilt from scratch if a CSV was rewritten or removed.
+    """
+    def sync(r, name, path):
+        return r.sync(name, d.row_count(name), lambda start: d.chunks(name, start), path,
+                      rollup_keys(name, getattr(d, name)))
+
+    with _rollups_lock:
+        r = Rollups.load(ROLLUPS_PATH) or Rollups()
+        sources = {name: dataset_source(name) for name in DATASET_NAMES if getattr(d, name) is not None}
+        if set(r.sources) - set(sources):
+            r = Rollups()
+        statuses = {}
+        for name, path in sources.items():
+            statuses[name] = sync(r, name, path)
+            if statuses[name] == 'stale':
+                break
+        if 'stale' in statuses.values():
+            r = Rollups()
+            statuses = {name: sync(r, name, path) for name, path in sources.items()}
+        if any(s != 'unchanged' for s in statuses.values()):
+            try:
+                r.save(ROLLUPS_PATH)
+            except OSError as e:
+                print("[!] Could not save rollups:", e)
+        print(f"[+] Rollups: {len(r)} entities ({', '.join(f'{n} {s}' for n, s in statuses.items()) or 'no datasets'})")
+        return r
+
+class Datasets:
+    """
+    One generation of the datasets and everything derived from them. Request
+    code takes a single reference (`d = get_datasets()`) and uses it throughout, so
+    a reload swaps the whole generation at once. `derived(name)` returns a
+    prebuilt 'handle_index' / 'rollups' / 'entity_graph' (or None to build it).
+    """
+
+    def __init__(self, frames, version, indexes=None, shared=None, generation=None, store=None, derived=None):
+        self.version = version
+        self.derived = derived or (lambda name: None)
+        self.generation = generation
+        self.shared = shared or {}
+        self.store = store or {}  # name -> StoreTable when the rows live on disk (PROFILER_BACKEND=sqlite)
+        self.breaches = frames.get('breaches')
+        self.person = frames.get('person')
+        self.actor = frames.get('actor')
+        if indexes is None:
+            indexes = {}
+            for name, df in frames.items():
+                if df is not None:
+                    cols, exact = search_columns(name, df)
+                    indexes[name] = FrameIndex(df, cols, exact=exact, name=name)
+        self.breach_index = indexes.get('breaches')
+        self.person_index = indexes.get('person')
+        self.actor_index = indexes.get('actor')
+        if self.store:
+            # rows on disk: rollups are read from the store, and there is no
+            # in-memory handle index (fuzzy matching is off in this mode)
+            self.handle_index = None
+            self.rollups = StoreRollups(indexes, {name: rollup_keys(name, t.frame) for name, t in self.store.items()})
+            return
+        self.handle_index = self.derived('handle_index')
+        if self.handle_index is None:
+            self.handle_index = build_handle_index(self)
+        print(f"[+] Fuzzy handle index: {len(self.handle_index)} handles")
+        self.rollups = self.derived('rollups')
+        if self.rollups is None:
+            self.rollups = sync_rollups(self)
+
+    def row_count(self, name):
+        return len(self.store[name]) if name in self.store else len(getattr(self, name))
+
+    def chunks(self, name, start=0):
+        """Rows of a dataset from position `start` on, as DataFrames (several pieces only for the on-disk store)."""
+        if name in self.store:
+            yield from self.store[name].chunks(start)
+        else:
+            df = getattr(self, name)
+            yield df.iloc[start:] if start else df
+
+    def full_frame(self, name):
+        """A dataset as an ordinary DataFrame (shared / stored datasets are materialized for the call)."""
+        if name in self.shared:
+            return self.shared[name].rows(range(len(self.shared[name])))
+        if name in self.store:
+            parts = list(self.store[name].chunks())
+            return pd.concat(parts) if parts else self.store[name].frame
+        return getattr(self, name)
+
+# ----------------------------
+# Shared datasets across worker processes (PROFILER_SHARED_DATA=1, see utils/shared_data.py)
+# ----------------------------
+def published_frames():
+    """(frames, search columns, derived structures) of a new shared generation."""
+    frames = load_frames()
+    # built here once per generation instead of in every attaching worker
+    d = Datasets(frames, datasets_signature(), indexes={})
+    derived = {'handle_index': d.handle_index, 'rollups': d.rollups, 'entity_graph': build_entity_graph(d)}
+    return frames, {name: search_columns(name, df)[0] for name, df in frames.items() if df is not None}, derived
+
+def attach_datasets(pointer):
+    tables = shared_data.attach(pointer)
+    indexes = {}
+    for name, table in tables.items():
+        cols, _ = search_columns(name, table.frame)  # exact lookups are vectorized scans here
+        indexes[name] = shared_data.ArrowFrameIndex(table, cols, name=name)
+    frames = {name: table.frame for name, table in tables.items()}
+    print(f"[+] Attached shared datasets {pointer['generation']}: "
+          + ", ".join(f"{n} {len(t)} rows" for n, t in tables.items()))
+    return Datasets(frames, pointer['version'], indexes=indexes, shared=tables, generation=pointer['generation'],
+                    derived=lambda name: shared_data.load_derived(pointer, name))
+
+_datasets_lock = threading.Lock()
+_datasets_watcher = None
 
-# Load person dataset (prefer explicit path if present)
-person_df = None
-for p in (PERSON_PATH, PERSON_DUMMY_PATH):
-    if os.path.exists(p):
+def refresh_datasets():
+    """
+    Shared mode: republish if the CSVs changed (one process does it) and swap
+    to the current generation. Runs for the first load and then on the watcher
+    thread; request threads only pick up the swapped `datasets` reference.
+    """
+    global datasets
+    with _datasets_lock:
         try:
-            person_df = pd.read_csv(p)
-            print(f"[+] Loaded person dataset: {len(person_df)} rows from {p}")
-            break
+            pointer = shared_data.ensure_published(datasets_signature(), published_frames)
+            if datasets is None or pointer['generation'] != datasets.generation:
+                datasets = attach_datasets(pointer)
         except Exception as e:
-            print("[!] Failed loading person dataset:", e)
+            if datasets is None:
+                raise
+            print("[!] Keeping current shared datasets:", e)
+        return datasets
+
+def _watch_shared_datasets():
+    while True:
+        time.sleep(SHARED_CHECK_INTERVAL)
+        refresh_datasets()
 
-# Load actor intelligence dataset
-actor_df = None
-if os.path.exists(ACTOR_PATH):
+def watch_shared_datasets():
+    """Check for a newer shared generation every SHARED_CHECK_INTERVAL seconds, off the request path."""
+    global _datasets_watcher
+    if _datasets_watcher is None:
+        _datasets_watcher = threading.Thread(target=_watch_shared_datasets, name="shared-data", daemon=True)
+        _datasets_watcher.start()
+
+def publish_datasets():
+    """Reload the CSVs into a new shared generation and switch to it."""
+    global datasets
+    pointer = shared_data.ensure_published(datasets_signature(), published_frames, force=True)
+    with _datasets_lock:
+        datasets = attach_datasets(pointer)
+    return pointer
+
+# ----------------------------
+# On-disk datasets (PROFILER_BACKEND=sqlite, see utils/sqlite_store.py)
+# ----------------------------
+def csv_chunks(name, path):
+    """The CSV in STORE_CHUNK_ROWS-row DataFrames, parsed as load_frames() parses it."""
+    if name != 'breaches':
+        return read_dataset_csv(path, chunksize=STORE_CHUNK_ROWS)
+    # read_breaches_csv: semicolons unless that parse fails, then commas
     try:
-        actor_df = pd.read_csv(ACTOR_PATH)
-        print(f"[+] Loaded actor intelligence dataset: {len(actor_df)} rows")
-    except Exception as e:
-        print("[!] Failed loading actor dataset:", e)
+        reader = pd.read_csv(path, sep=';', encoding='utf-8', on_bad_lines='skip', chunksize=STORE_CHUNK_ROWS)
+        first = next(reader)
+    except StopIteration:
+        return iter(())
+    except Exception:
+        return pd.read_csv(path, sep=',', encoding='utf-8', on_bad_lines='skip', chunksize=STORE_CHUNK_ROWS)
+    return itertools.chain([first], reader)
+
+def open_store_datasets():
+    """Datasets served from STORE_PATH; datasets whose CSV changed are re-imported first."""
+    store = SqliteStore(STORE_PATH)
+    tables, indexes = {}, {}
+    for name in DATASET_NAMES:
+        path = dataset_source(name)
+        if path is None:
+            store.drop(name)
+            continue
+        meta = store.meta(name)
+        if meta is None or meta['signature'] != file_signature(path):
+            try:
+                # waits while another worker builds it, then reuses that build
+                store.build(name, csv_chunks(name, path), lambda df: search_columns(name, df), file_signature(path))
+            except Exception as e:
+                print(f"[!] Failed storing {name} dataset (serving the stored copy, if any):", e)
+        table = store.table(name)
+        if table is None:
+            continue
+        metrics.set_gauge('profiler_dataset_rows', len(table), dataset=name)
+        tables[name] = table
+        indexes[name] = StoreFrameIndex(table, search_columns(name, table.frame)[0], name=name)
+    print(f"[+] Opened dataset store {STORE_PATH}: " + ", ".join(f"{n} {len(t)} rows" for n, t in tables.items()))
+    frames = {name: table.frame for name, table in tables.items()}
+    return Datasets(frames, datasets_signature(), indexes=indexes, store=tables)
+
+datasets = None
+
+def load_datasets():
+    """First load: open the on-disk store, attach the shared generation (publishing it if needed) or read the CSVs."""
+    global datasets
+    if DATA_BACKEND == "sqlite":
+        datasets = open_store_datasets()
+    elif SHARED_DATA:
+        refresh_datasets()
+        watch_shared_datasets()
+    else:
+        datasets = Datasets(load_frames(), datasets_signature())
+    return datasets
+
+def get_datasets():
+    """Current dataset generation, loaded on first use."""
+    d = datasets
+    return d if d is not None else resources['datasets'].get()
+
+# ----------------------------
+# Entity correlation graph (built at ingest/load time, see utils/entity_graph.py)
+# ----------------------------
+def sample_record_id(sample):
+    # content-addressed, so a rewritten sample counts as removed + added
+    text = sample.get('text', '') or ''
+    return f"{sample.get('id')}:{hashlib.sha1(str(text).encode('utf-8')).hexdigest()[:12]}"
+
+def sample_entities(samples):
+    """
+    One entities dict per sample. Bulk-ingested samples carry the result of the
+    current extractor (utils/ingest.py); the rest go through the extraction cache.
+    """
+    out = [s.get('entities') if s.get('extractor') == EXTRACTOR_VERSION else None for s in samples]
+    todo = [i for i, ents in enumerate(out) if ents is None]
+    if todo:
+        fresh = cached_extract_many([samples[i].get('text', '') for i in todo], n_process=EXTRACT_PROCESSES)
+        for i, ents in zip(todo, fresh):
+            out[i] = ents
+    return out
+
+def build_entity_graph(d):
+    # a shared generation carries the dataset part prebuilt (loaded fresh, since samples are folded into it)
+    g = EntityGraph.matching(d.derived('entity_graph'), d.version)
+    if g is not None:
+        return g
+    g = EntityGraph(version=d.version)
+    for name in ('person', 'actor'):
+        # datasets in the on-disk store are left out: folding them in would hold every row's identifiers in memory
+        if getattr(d, name) is not None and name not in d.store:
+            for df in d.chunks(name):
+                g.add_frame(df, name)
+    return g
+
+entity_graph = None  # loaded from ENTITY_GRAPH_PATH by the first sync
+_graph_lock = threading.Lock()
+_graph_samples_version = None
+_graph_marks = None  # sample index marks() the graph has been synced up to
+_graph_dirty = threading.Event()
+_graph_saver = None
+GRAPH_SAVE_DELAY = 5  # seconds a change waits, so a burst of syncs is saved once
+
+def _save_graph_loop():
+    while True:
+        _graph_dirty.wait()
+        time.sleep(GRAPH_SAVE_DELAY)
+        _graph_dirty.clear()
+        g = entity_graph
+        if g is None:
+            continue
+        try:
+            g.save(ENTITY_GRAPH_PATH)
+        except OSError as e:
+            print("[!] Could not save entity graph:", e)
+
+def schedule_graph_save():
+    """Persist the graph from a background thread instead of the calling request."""
+    global _graph_saver
+    if _graph_saver is None:
+        _graph_saver = threading.Thread(target=_save_graph_loop, name="graph-save", daemon=True)
+        _graph_saver.start()
+    _graph_dirty.set()
+
+def sync_entity_graph():
+    """
+    Fold samples added since the last sync into the graph (one batched
+    extraction). Only samples past the sample index's marks of the previous
+    sync are read, so a sync costs O(new samples). Union-find components
+    cannot split, so if a sample was removed or rewritten (and on the first
+    sync, or for a new dataset generation) every sample is checked and the
+    graph rebuilt if needed. Changes are saved in the background
+    (schedule_graph_save).
+    """
+    global entity_graph, _graph_samples_version, _graph_marks
+    idx = get_sample_index()
+    d = get_datasets()
+    with _graph_lock:
+        if entity_graph is not None and entity_graph.version == d.version and idx.version == _graph_samples_version:
+            return entity_graph
+        g = entity_graph if entity_graph is not None and entity_graph.version == d.version else None
+        added, marks = idx.samples_since(_graph_marks) if g is not None else (None, idx.marks())
+        if added is None:
+            samples = list(idx.samples())
+            ids = [sample_record_id(s) for s in samples]
+            g = g or EntityGraph.load(ENTITY_GRAPH_PATH, d.version)
+            if g is None or not g.records_of('sample') <= set(ids):
+                g = build_entity_graph(d)
+        else:
+            samples = added
+            ids = [sample_record_id(s) for s in samples]
+        # samples indexed between marks() and the read may come again next time; has_record skips them
+        new = [(rid, s) for rid, s in zip(ids, samples) if not g.has_record(('sample', rid))]
+        if new:
+            extracted = sample_entities([s for _, s in new])
+            for (rid, _), ents in zip(new, extracted):
+                g.add_extracted(('sample', rid), ents)
+        changed = bool(new) or g is not entity_graph
+        entity_graph = g
+        _graph_samples_version = idx.version
+        _graph_marks = marks
+        if changed:
+            schedule_graph_save()
+        return g
 
 # ----------------------------
 # Utility helpers
@@ -86,26 +535,120 @@ def compute_threat_score_from_breaches(breach_records):
     score = min(95, int((avg / 1_000_000) * 10) + min(30, 10 * len(breach_records)))
     return score
 
-def combine_scores(breach_score, actor_hits):
-    """Blend breach impact and actor risk into final threat score (0-100)."""
+# map risk levels (Critical/High/Medium/Low) to numeric
+RISK_MAP = {"Critical": 30, "High": 20, "Medium": 10, "Low": 4}
+
+def actor_boost_from_records(actor_hits):
+    """Average risk x confidence over actor records, capped at 40."""
     actor_boost = 0
     if actor_hits:
-        # map risk levels (Critical/High/Medium/Low) to numeric
-        risk_map = {"Critical": 30, "High": 20, "Medium": 10, "Low": 4}
         total = 0
         for a in actor_hits:
             r = a.get('risk_level') or a.get('risk') or "Medium"
-            total += risk_map.get(r, 8) * (a.get('confidence', 0.6) or 0.6)
+            total += RISK_MAP.get(r, 8) * (a.get('confidence', 0.6) or 0.6)
         actor_boost = min(40, int(total / max(1, len(actor_hits))))
+    return actor_boost
+
+def combine_scores(breach_score, actor_hits):
+    """Blend breach impact and actor risk into final threat score (0-100)."""
+    return blend_scores(breach_score, actor_boost_from_records(actor_hits))
+
+def blend_scores(breach_score, actor_boost):
     # weighted blend
     final = min(100, int(0.6 * breach_score + 0.4 * actor_boost))
     return final
 
-def make_descriptive_report(profile):
+# ----------------------------
+# Vectorized scoring over matched frames
+# ----------------------------
+# Same results as compute_threat_score_from_breaches / combine_scores on the
+# frame's to_dict('records'), without building the dicts: per-value Python
+# semantics (truthiness, int() parsing, dict lookups) are evaluated once per
+# distinct value and broadcast back with factorize.
+def per_value(series, func, dtype=object):
+    values = series.astype(object)
+    codes, uniques = pd.factorize(values)
+    out = np.array([func(u) for u in uniques] + [func(None)], dtype=dtype)[codes]
+    # factorize folds None and NaN into one missing code; evaluate those on the real values
+    missing = np.flatnonzero(codes == -1)
+    if len(missing):
+        raw = values.to_numpy()
+        out[missing] = [func(v) for v in raw[missing]]
+    return out
+
+def truthy(series):
+    """bool(v) per row (NaN counts as truthy, as in the dict path)."""
+    if series.dtype == bool:
+        return series.to_numpy()
+    if pd.api.types.is_numeric_dtype(series):
+        return (series != 0).to_numpy()
+    return per_value(series, bool, dtype=bool)
+
+def _int_or_zero(v):
+    try:
+        return int(v)
+    except Exception:
+        # non-numeric strings like 'Unknown' -> 0
+        return 0
+
+def as_int(series):
+    """int(v) per row, 0 where int() would fail."""
+    if pd.api.types.is_integer_dtype(series) or series.dtype == bool:
+        return series.to_numpy(dtype=np.int64)
+    if pd.api.types.is_float_dtype(series):
+        v = series.to_numpy(dtype=np.float64)
+        ok = np.isfinite(v)
+        return np.where(ok, np.trunc(np.where(ok, v, 0)), 0).astype(np.int64)
+    return per_value(series, _int_or_zero, dtype=np.int64)
+
+def compute_threat_score_from_frame(matches):
+    """compute_threat_score_from_breaches over a DataFrame of matched breach rows."""
+    n = len(matches)
+    if not n:
+        return 0
+    records = np.zeros(n, dtype=np.int64)
+    # v = r.get('Records Lost') or r.get('records_lost') or 0, evaluated right to left
+    for col in ('records_lost', 'Records Lost'):
+        if col in matches.columns:
+            records = np.where(truthy(matches[col]), as_int(matches[col]), records)
+    records = np.maximum(records, 0)
+    avg = int(records.sum()) / n
+    # scale: every 1M records -> +10 score, clipped
+    return min(95, int((avg / 1_000_000) * 10) + min(30, 10 * n))
+
+def actor_boost_from_frame(actor_hits_df):
+    """Actor boost of combine_scores over a DataFrame of matched actor rows."""
+    n = len(actor_hits_df)
+    if not n:
+        return 0
+    conf = actor_hits_df['confidence'] if 'confidence' in actor_hits_df.columns else None
+    if conf is not None and not pd.api.types.is_numeric_dtype(conf):
+        # non-numeric confidences: keep the exact dict semantics
+        return actor_boost_from_records(actor_hits_df.to_dict(orient='records'))
+    weight = np.full(n, RISK_MAP["Medium"], dtype=np.int64)
+    # r = a.get('risk_level') or a.get('risk') or "Medium", evaluated right to left
+    for col in ('risk', 'risk_level'):
+        if col in actor_hits_df.columns:
+            weight = np.where(truthy(actor_hits_df[col]),
+                              per_value(actor_hits_df[col], lambda r: RISK_MAP.get(r, 8), dtype=np.int64),
+                              weight)
+    if conf is None:
+        c = np.full(n, 0.6)
+    else:
+        c = conf.to_numpy(dtype=np.float64)
+        c = np.where(c == 0, 0.6, c)  # `or 0.6`; NaN stays NaN like the dict path
+    # cumsum accumulates left to right, matching the loop's float rounding
+    total = float(np.cumsum(weight * c)[-1])
+    return min(40, int(total / max(1, n)))
+
+def make_descriptive_report(profile, counts=None):
     """
     Build a multi-paragraph, slide-like descriptive report that mirrors the PPT.
     Includes: Problem, Solution, Demo Findings, Impact, Roadmap, Recommendations.
+    `counts` gives the full match count per section when the response rows were
+    limited (see match_counts); otherwise the listed rows are counted.
     """
+    counts = counts or {}
     lines = []
     lines.append(f"Profiler.AI — Descriptive Intelligence Report for query '{profile.get('query')}'")
     lines.append("")
@@ -129,7 +672,7 @@ def make_descriptive_report(profile):
     # summarize breach_data
     b = profile.get('breach_data', [])
     if b:
-        lines.append(f"- Organization-level breaches found: {len(b)}. Top incident examples:")
+        lines.append(f"- Organization-level breaches found: {counts.get('breach_data', len(b))}. Top incident examples:")
         for br in b[:3]:
             org = br.get('Entity') or br.get('organization') or 'Unknown org'
             yr = br.get('Year') or br.get('year') or br.get('year')
@@ -147,7 +690,7 @@ def make_descriptive_report(profile):
     # actor intel
     a = profile.get('actor_intel', [])
     if a:
-        lines.append(f"- Actor intelligence signals detected: {len(a)} records. Sample activities:")
+        lines.append(f"- Actor intelligence signals detected: {counts.get('actor_intel', len(a))} records. Sample activities:")
         # show activity types and platforms
         for act in a[:4]:
             lines.append(f"  • {act.get('activity_type')} on {act.get('platform')} (risk: {act.get('risk_level')}, conf: {act.get('confidence')})")
@@ -184,19 +727,16 @@ def make_descriptive_report(profile):
 # ----------------------------
 # Core profile builder
 # ----------------------------
-def build_profile(query):
-    query_lower = query.strip().lower()
-    profile = {'query': query}
+# build_profile is split into independent lookup stages so they can run one
+# after another (default) or side by side on STAGE_POOL, and so the streaming
+# endpoint can emit each section as soon as its stage finishes.
+PROFILE_SECTIONS = ('local_hits', 'clusters', 'breach_data', 'person_breach', 'actor_intel', 'fuzzy_matches')
 
-    # 1) Local samples (existing behaviour)
-    samples = collect_local_samples()
-    hits = [s for s in samples if query_lower in s.get('text', '').lower()]
-    profile['local_hits'] = hits
-    # entity extraction across local hits
+def build_clusters(hits, extracted):
+    """Group entity occurrences across sample hits; `extracted` is one entities dict per hit."""
     entity_map = {}
-    for h in hits:
+    for h, ents in zip(hits, extracted):
         text = h.get('text', '')
-        ents = extract(text)
         occ = { "source": h.get('source','local'), "id": h.get('id'), "text": text, "timestamp": h.get('timestamp') }
         for e in ents.get('emails', []):
             entity_map.setdefault(('email', e), []).append(occ)
@@ -215,139 +755,426 @@ def build_profile(query):
             'occurrences': occs,
             'score': score_entity(occs)
         })
-    profile['clusters'] = clusters
-
-    # 2) Organization-level breaches (Kaggle dataset)
-    breach_hits = []
-    if df_breaches is not None:
-        # check common columns and normalize names
-        cols = [c.lower() for c in df_breaches.columns]
-        # find likely entity/alt name columns
-        entity_col = None
-        alt_col = None
-        for c in df_breaches.columns:
-            if 'entity' in c.lower():
-                entity_col = c
-            if 'alternative' in c.lower() or 'alt' in c.lower():
-                alt_col = c
-        # search in both columns if present
-        cond = False
-        if entity_col:
-            cond = df_breaches[entity_col].astype(str).str.lower().str.contains(query_lower, na=False)
-        if alt_col:
-            cond = cond | df_breaches[alt_col].astype(str).str.lower().str.contains(query_lower, na=False)
-        matches = df_breaches[cond] if isinstance(cond, (pd.Series,)) else df_breaches[ df_breaches.apply(lambda r: query_lower in str(r).lower(), axis=1) ]
-        if not matches.empty:
-            # select helpful columns if they exist
-            pick = []
-            for cand in ["Entity","Organization","Story","Year","Records Lost","records_lost","Year "]:
-                if cand in matches.columns:
-                    pick.append(cand)
-            # if none matched, pick first three
-            if not pick:
-                pick = list(matches.columns[:4])
-            breach_hits = matches[pick].to_dict(orient='records')
-    profile['breach_data'] = breach_hits
-
-    # 3) Personal breach lookup (synthetic person dataset)
+    return clusters
+
+def limit_rows(frame):
+    # only the rows that go into the response are turned into dicts
+    return frame.head(RESPONSE_ROW_LIMIT) if RESPONSE_ROW_LIMIT else frame
+
+def breach_records(matches):
+    """Response records for matched breach rows."""
+    matches = limit_rows(matches)
+    if matches.empty:
+        return []
+    # select helpful columns if they exist
+    pick = []
+    for cand in ["Entity","Organization","Story","Year","Records Lost","records_lost","Year "]:
+        if cand in matches.columns:
+            pick.append(cand)
+    # if none matched, pick first three
+    if not pick:
+        pick = list(matches.columns[:4])
+    return matches[pick].to_dict(orient='records')
+
+def breach_section(matches):
+    # scored over every match, vectorized; only the response rows are materialized
+    metrics.inc('profiler_hits_total', len(matches), section='breach_data')
+    with metrics.timer('breaches_materialize'):
+        return {'breach_data': breach_records(matches), '_breach_score': compute_threat_score_from_frame(matches),
+                '_breach_count': len(matches)}
+
+def actor_section(actor_hits_df):
+    metrics.inc('profiler_hits_total', len(actor_hits_df), section='actor_intel')
+    with metrics.timer('actor_materialize'):
+        return {'actor_intel': limit_rows(actor_hits_df).to_dict(orient='records'),
+                '_actor_boost': actor_boost_from_frame(actor_hits_df),
+                '_actor_count': len(actor_hits_df)}
+
+def breach_scan(d, query_lower):
+    # fallback when neither an entity nor an alt-name column exists
+    df_breaches = d.full_frame('breaches')
+    metrics.inc('profiler_rows_scanned_total', len(df_breaches), dataset='breaches')
+    return df_breaches[ df_breaches.apply(lambda r: query_lower in str(r).lower(), axis=1) ]
+
+def stage_local(d, query_lower):
+    """Local samples + entity clusters -> {'local_hits', 'clusters'}"""
+    # answered from the in-memory n-gram index
+    with metrics.timer('samples_lookup'):
+        hits = search_local_samples(query_lower)
+    metrics.inc('profiler_hits_total', len(hits), section='local_hits')
+    # entity extraction across local hits
+    with metrics.timer('extraction'):
+        extracted = sample_entities(hits)
+    with metrics.timer('clustering'):
+        return {'local_hits': [public_sample(h) for h in hits], 'clusters': build_clusters(hits, extracted)}
+
+def stage_breaches(d, query_lower):
+    """Organization-level breaches (Kaggle dataset) -> {'breach_data'}"""
+    if d.breaches is None:
+        return {'breach_data': []}
+    # entity / alt name columns are indexed at load time
+    with metrics.timer('breaches_lookup'):
+        matches = d.breach_index.contains(query_lower) if d.breach_index else breach_scan(d, query_lower)
+    return breach_section(matches)
+
+def stage_person(d, query_lower):
+    """Personal breach lookup (synthetic person dataset) -> {'person_breach'}"""
     person_hits = []
-    if person_df is not None:
-        # if query looks like email, try exact email matches; else substring
-        if "@" in query_lower:
-            person_hits = person_df[ person_df['email'].astype(str).str.lower() == query_lower ].to_dict(orient='records')
-        else:
-            # search by username or partial email local part
-            person_hits = person_df[
-                person_df['email'].astype(str).str.lower().str.contains(query_lower, na=False) |
-                person_df.get('username', pd.Series()).astype(str).str.lower().str.contains(query_lower, na=False)
-            ].to_dict(orient='records')
-    profile['person_breach'] = person_hits
-
-    # 4) Actor intelligence correlation (activity, risk)
-    actor_hits = []
-    if actor_df is not None:
-        actor_hits_df = actor_df[
-            safe_contains(actor_df.get('email', pd.Series(dtype=str)), query_lower) |
-            safe_contains(actor_df.get('username', pd.Series(dtype=str)), query_lower)
-        ]
-        if not actor_hits_df.empty:
-            actor_hits = actor_hits_df.to_dict(orient='records')
-    profile['actor_intel'] = actor_hits
-
-    # 5) compute threat scoring
-    breach_score = compute_threat_score_from_breaches(breach_hits)
-    final_score = combine_scores(breach_score, actor_hits)
-    profile['scores'] = {
+    if d.person is not None:
+        with metrics.timer('person_lookup'):
+            # if query looks like email, try exact email matches; else substring
+            if "@" in query_lower:
+                person_hits = d.person_index.equal('email', query_lower).to_dict(orient='records')
+            else:
+                # search by username or partial email local part
+                person_hits = d.person_index.contains(query_lower).to_dict(orient='records')
+        metrics.inc('profiler_hits_total', len(person_hits), section='person_breach')
+    return {'person_breach': person_hits}
+
+def stage_actor(d, query_lower):
+    """Actor intelligence correlation (activity, risk) -> {'actor_intel'}"""
+    if d.actor is None:
+        return {'actor_intel': []}
+    with metrics.timer('actor_lookup'):
+        matches = d.actor_index.contains(query_lower)
+    return actor_section(matches)
+
+def stage_fuzzy(d, query_lower):
+    """Near-miss usernames / email local parts (fuzzy mode only) -> {'fuzzy_matches'}"""
+    if d.handle_index is None:
+        return {'fuzzy_matches': []}  # not available with PROFILER_BACKEND=sqlite
+    with metrics.timer('fuzzy_lookup'):
+        matches = d.handle_index.query(query_lower, limit=FUZZY_LIMIT)
+    metrics.inc('profiler_hits_total', len(matches), section='fuzzy_matches')
+    return {'fuzzy_matches': matches}
+
+PROFILE_STAGES = (stage_local, stage_breaches, stage_person, stage_actor)
+CONCURRENT_STAGES = os.environ.get("PROFILER_CONCURRENT_STAGES", "0") == "1"
+STAGE_POOL = ThreadPoolExecutor(max_workers=int(os.environ.get("PROFILER_STAGE_WORKERS", "8")),
+                                thread_name_prefix="profile-stage")
+
+def match_counts(profile):
+    """Full match counts the stages recorded under '_breach_count' / '_actor_count'."""
+    counts = {}
+    if '_breach_count' in profile:
+        counts['breach_data'] = profile['_breach_count']
+    if '_actor_count' in profile:
+        counts['actor_intel'] = profile['_actor_count']
+    return counts
+
+def score_profile(profile):
+    """
+    Threat scores for a profile. Stages leave frame-level inputs under
+    '_breach_score' / '_actor_boost'; otherwise the record lists are scored.
+    """
+    if '_breach_score' in profile:
+        breach_score = profile['_breach_score']
+    else:
+        breach_score = compute_threat_score_from_breaches(profile.get('breach_data', []))
+    if '_actor_boost' in profile:
+        actor_boost = profile['_actor_boost']
+    else:
+        actor_boost = actor_boost_from_records(profile.get('actor_intel', []))
+    return {
         'breach_impact_score': breach_score,
-        'actor_boost_estimate': max(0, combine_scores(0, actor_hits) - combine_scores(0, [])),
-        'final_threat_score': final_score
+        'actor_boost_estimate': max(0, blend_scores(0, actor_boost) - blend_scores(0, 0)),
+        'final_threat_score': blend_scores(breach_score, actor_boost)
     }
 
-    # 6) descriptive report (long text for PPT / slide narration)
-    profile['descriptive_report'] = make_descriptive_report(profile)
+def iter_profile_sections(query, concurrent=True, fuzzy=False, d=None):
+    """
+    Yield (section, value) pairs for a profile: the lookup sections in the order
+    their stages finish, then 'scores' and 'descriptive_report'. With fuzzy=True
+    a 'fuzzy_matches' section lists near-miss handles with similarity scores.
+    `d` overrides the current Datasets (used by the backend parity check).
+    """
+    query_lower = query.strip().lower()
+    profile = {'query': query}
+    if d is None:
+        d = get_datasets()  # one generation for the whole profile
+    stages = PROFILE_STAGES + (stage_fuzzy,) if fuzzy else PROFILE_STAGES
+    if concurrent:
+        futures = [STAGE_POOL.submit(metrics.bind(stage), d, query_lower) for stage in stages]
+        results = (f.result() for f in as_completed(futures))
+    else:
+        results = (stage(d, query_lower) for stage in stages)
+    for part in results:
+        for section, value in part.items():
+            profile[section] = value
+            if not section.startswith('_'):  # '_' keys are scoring inputs
+                yield section, value
+
+    # compute threat scoring
+    with metrics.timer('scoring'):
+        profile['scores'] = score_profile(profile)
+    yield 'scores', profile['scores']
+    # descriptive report (long text for PPT / slide narration)
+    with metrics.timer('descriptive_report'):
+        profile['descriptive_report'] = make_descriptive_report(assemble_profile(profile), match_counts(profile))
+    yield 'descriptive_report', profile['descriptive_report']
+
+def assemble_profile(sections):
+    """Put sections into the canonical profile key order."""
+    keys = ('query',) + PROFILE_SECTIONS + ('scores', 'descriptive_report')
+    return {k: sections[k] for k in keys if k in sections}
+
+def build_profile(query, concurrent=None, fuzzy=False, d=None):
+    if concurrent is None:
+        concurrent = CONCURRENT_STAGES
+    profile = {'query': query}
+    profile.update(iter_profile_sections(query, concurrent=concurrent, fuzzy=fuzzy, d=d))
+    return assemble_profile(profile)
+
+def iter_profiles_batch(queries):
+    """
+    Profile many queries at once, yielding (query, profile) as each is assembled.
+
+    All queries are matched together: one Aho-Corasick pass over the sample
+    texts and over each indexed dataset column, one batched extraction over
+    every distinct hit text. Each profile is identical to build_profile(query).
+    """
+    queries = [q.strip() for q in queries if q and q.strip()]
+    d = get_datasets()
+    lowers = list(dict.fromkeys(q.lower() for q in queries))
+    slot = {ql: i for i, ql in enumerate(lowers)}
 
-    return profile
+    # 1) local samples: single pass over the indexed texts
+    sample_hits = [[] for _ in lowers]
+    if lowers:
+        ac = AhoCorasick(lowers).build()
+        for sample, lower in get_sample_index().scan():
+            for pid in ac.find(lower):
+                sample_hits[pid].append(sample)
+    distinct = list({id(h): h for hits in sample_hits for h in hits}.values())
+    extracted = dict(zip(map(id, distinct), sample_entities(distinct)))
+
+    # 2-4) dataset columns: single pass per indexed column
+    breach_pos = d.breach_index.positions_contains_many(lowers) if d.breach_index else None
+    actor_pos = d.actor_index.positions_contains_many(lowers) if d.actor_index is not None else None
+    person_pos = {}
+    if d.person_index is not None:
+        substr = [ql for ql in lowers if "@" not in ql]
+        person_pos = dict(zip(substr, d.person_index.positions_contains_many(substr)))
+        for ql in lowers:
+            if "@" in ql:
+                person_pos[ql] = d.person_index.positions_equal('email', ql)
+
+    for q in queries:
+        ql = q.lower()
+        i = slot[ql]
+        hits = sample_hits[i]
+        profile = {'query': q, 'local_hits': [public_sample(h) for h in hits],
+                   'clusters': build_clusters(hits, [extracted[id(h)] for h in hits])}
+        profile['breach_data'] = []
+        if d.breaches is not None:
+            matches = d.breach_index.rows(breach_pos[i]) if breach_pos is not None else breach_scan(d, ql)
+            profile.update(breach_section(matches))
+        profile['person_breach'] = d.person_index.rows(person_pos[ql]).to_dict(orient='records') if d.person_index is not None else []
+        profile['actor_intel'] = []
+        if d.actor_index is not None:
+            profile.update(actor_section(d.actor_index.rows(actor_pos[i])))
+        profile['scores'] = score_profile(profile)
+        counts = match_counts(profile)
+        profile = assemble_profile(profile)
+        profile['descriptive_report'] = make_descriptive_report(profile, counts)
+        yield q, profile
+
+# ----------------------------
+# Warm-up
+# ----------------------------
+# Importing this module loads nothing heavy; each resource is loaded on first
+# use, or ahead of the first request by resources.warm_up() / preload(), which
+# load the independent ones concurrently. /api/ready reports their state.
+def warm_entity_graph():
+    g = sync_entity_graph()
+    print(f"[+] Entity graph: {len(g)} identifiers")
+    return g
+
+resources = Registry()
+resources.add('ner_model', get_nlp, loaded=model_loaded)
+resources.add('datasets', load_datasets, loaded=lambda: datasets is not None)
+resources.add('sample_index', get_sample_index, loaded=sample_index_loaded)
+# the graph only adds linked identifiers to profiles, so it does not gate readiness
+resources.add('entity_graph', warm_entity_graph, requires=('datasets', 'sample_index'),
+              loaded=lambda: entity_graph is not None, optional=True)
+
+if PRELOAD == "1":
+    resources.preload()
 
 # ----------------------------
 # Routes
 # ----------------------------
+@app.route('/api/ready')
+def api_ready():
+    """Readiness probe: 200 once the required resources are loaded, else 503 with per-resource state."""
+    ready = resources.ready
+    return jsonify({'ready': ready,
+                    'resources': resources.status(optional=False),
+                    'optional': resources.status(optional=True)}), 200 if ready else 503
+
 @app.route('/api/profile')
 def api_profile():
     q = request.args.get('q', '').strip()
     if not q:
         return jsonify({'error': 'missing query parameter q'}), 400
-    profile = build_profile(q)
-    return jsonify(profile)
+    concurrent = request.args.get('concurrent')
+    concurrent = None if concurrent is None else concurrent == '1'
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true')
+    try:
+        opts = payload.Options.from_args(request.args)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be non-negative integers'}), 400
+    fmt = payload.negotiate_format(request.headers.get('Accept'))
+    mimetype = app.json.mimetype if fmt == 'json' else payload.MSGPACK_TYPES[0]
+    variant = '|'.join(['fuzzy' if fuzzy else '', opts.key(), fmt])
+    with metrics.request('profile', query=q):
+        if request.args.get('nocache') == '1':
+            body = render_profile(build_profile(q, concurrent=concurrent, fuzzy=fuzzy), opts, fmt)
+        else:
+            version = dataset_version()
+            body = profile_cache.get(q, version, variant)
+            if body is None:
+                metrics.inc('profiler_result_cache_total', result='miss')
+                body = render_profile(build_profile(q, concurrent=concurrent, fuzzy=fuzzy), opts, fmt)
+                profile_cache.put(q, version, body, variant)
+            else:
+                metrics.inc('profiler_result_cache_total', result='hit')
+        body, encoding = payload.compress(body, request.headers.get('Accept-Encoding'))
+        resp = Response(body, mimetype=mimetype)
+        if encoding:
+            resp.headers['Content-Encoding'] = encoding
+        resp.vary.update(('Accept', 'Accept-Encoding'))
+        return resp
+
+def render_profile(profile, opts, fmt):
+    """Serialized profile body; the default shape is byte-identical to jsonify()."""
+    with metrics.timer('serialize'):
+        if opts.default and fmt == 'json':
+            return jsonify(profile).get_data()
+        return payload.encode(payload.shape(profile, opts), fmt, app.json.dumps)[0]
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of the built-in instrumentation (see utils/metrics.py)."""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache/stats')
+def api_cache_stats():
+    return jsonify({
+        'dataset_version': dataset_version(),
+        'profile_cache': profile_cache.info(),
+        'extraction_cache': get_extraction_cache().info(),
+    })
+
+@app.route('/api/profile/stream')
+def api_profile_stream():
+    """
+    Same profile as /api/profile, sent as NDJSON: one {"section", "data"} line per
+    section as soon as it is ready, scores and descriptive_report last.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'missing query parameter q'}), 400
+
+    fuzzy = request.args.get('fuzzy', '').lower() in ('1', 'true')
+
+    def generate():
+        yield app.json.dumps({'section': 'query', 'data': q}) + "\n"
+        for section, value in iter_profile_sections(q, concurrent=True, fuzzy=fuzzy):
+            yield app.json.dumps({'section': section, 'data': value}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/graph')
+def api_graph():
+    """Linked identifier clusters for an exact email / username / phone / wallet / name."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'missing query parameter q'}), 400
+    return jsonify({'query': q, 'clusters': sync_entity_graph().lookup(q)})
+
+@app.route('/api/aggregate')
+def api_aggregate():
+    """
+    Precomputed rollups (counts by year / platform / activity_type /
+    risk_level / breach_source, summed Records Lost) for an exact email,
+    username or organization; ?type= restricts the lookup to one kind.
+    """
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'missing query parameter q'}), 400
+    kind = request.args.get('type')
+    if kind is not None and kind not in ROLLUP_KINDS:
+        return jsonify({'error': f"type must be one of {', '.join(ROLLUP_KINDS)}"}), 400
+    rollups = get_datasets().rollups
+    found = {}
+    for k in ([kind] if kind else ROLLUP_KINDS):
+        r = rollups.get(k, q)
+        if r is not None:
+            found[k] = r
+    return jsonify({'query': q, 'rollups': found})
+
+@app.route('/api/profile/batch', methods=['POST'])
+def api_profile_batch():
+    """
+    Profile a list of queries: JSON {"queries": [...]} (or a bare list), or a
+    plain-text body with one query per line. Streams NDJSON {"query", "profile"}
+    lines as each profile completes.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        queries = data.get('queries') or []
+    elif isinstance(data, list):
+        queries = data
+    elif data is None:
+        queries = request.get_data(as_text=True).splitlines()
+    else:
+        queries = None
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({'error': 'queries must be a list of strings'}), 400
+    queries = [q for q in queries if q.strip()]
+    if not queries:
+        return jsonify({'error': 'no queries supplied'}), 400
+
+    def generate():
+        for q, profile in iter_profiles_batch(queries):
+            yield app.json.dumps({'query': q, 'profile': profile}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @app.route('/api/report', methods=['POST'])
 def api_report():
+    """Render the report and wait for it (kept for existing clients); see /api/report/jobs."""
     data = request.json
     if not data:
         return jsonify({'error': 'missing body'}), 400
+    with metrics.request('report', query=data.get('query')):
+        job = report_queue.wait(report_queue.submit(data), timeout=REPORT_WAIT_TIMEOUT)
+    if job.status == 'failed':
+        return jsonify(job.to_dict()), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    return jsonify({'report_path': job.report_path, 'sha256': job.sha256, 'job_id': job.id})
 
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, f"Profiler.AI Report - {data.get('query', '')}", ln=True)
-    pdf.set_font('Arial', '', 10)
-    pdf.multi_cell(0, 6, data.get('summary', data.get('descriptive_report', '')[:1000]))
-
-    # clusters
-    for c in data.get('clusters', []):
-        pdf.ln(2)
-        pdf.set_font('Arial','B',10)
-        pdf.cell(0,6, f"{c.get('type')} : {c.get('value')} (score {c.get('score')})", ln=True)
-        pdf.set_font('Arial','',9)
-        for occ in c.get('occurrences', [])[:5]:
-            pdf.multi_cell(0,5, f"- {occ.get('source')} / {occ.get('id')}")
-
-    # breach data
-    if data.get('breach_data'):
-        pdf.ln(3)
-        pdf.set_font('Arial','B',12)
-        pdf.cell(0,6, "Breach Records", ln=True)
-        pdf.set_font('Arial','',9)
-        for b in data.get('breach_data')[:10]:
-            pdf.multi_cell(0,5, str(b))
+@app.route('/api/report/jobs', methods=['POST'])
+def api_report_submit():
+    """Queue a PDF report; returns the job id to poll (identical profiles share a job)."""
+    data = request.json
+    if not data:
+        return jsonify({'error': 'missing body'}), 400
+    job = report_queue.submit(data)
+    return jsonify(job.to_dict()), 202
 
-    # actor intel
-    if data.get('actor_intel'):
-        pdf.ln(3)
-        pdf.set_font('Arial','B',12)
-        pdf.cell(0,6, "Actor Intelligence", ln=True)
-        pdf.set_font('Arial','',9)
-        for a in data.get('actor_intel')[:10]:
-            pdf.multi_cell(0,5, f"{a.get('username','')} | {a.get('platform','')} | {a.get('activity_type','')} | risk:{a.get('risk_level')} | conf:{a.get('confidence')}")
-
-    # save
-    fname = f"report_{data.get('query','profile')}.pdf"
-    path = os.path.join(DATA_DIR, fname)
-    pdf.output(path)
-
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        h.update(f.read())
-    return jsonify({'report_path': path, 'sha256': h.hexdigest()})
+@app.route('/api/report/jobs/<job_id>')
+def api_report_status(job_id):
+    """Job status; ?wait=N long-polls up to N seconds for completion."""
+    job = report_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    wait = request.args.get('wait', type=float)
+    if wait:
+        report_queue.wait(job, timeout=min(wait, REPORT_WAIT_TIMEOUT))
+    return jsonify(job.to_dict())
 
 @app.route('/')
 def index():
@@ -362,4 +1189,7 @@ def index():
 if __name__ == '__main__':
     # ensure data directory exists
     os.makedirs(DATA_DIR, exist_ok=True)
+    # the port is bound right away; the heavy parts load alongside (in the reloader's child only)
+    if PRELOAD != "0" and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        resources.preload()
     app.run(debug=True, port=5000)
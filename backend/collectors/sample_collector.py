@@ -1,7 +1,9 @@
 import glob, json, os
 
+from collectors.segment_store import iter_samples
+
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-SAMPLES_DIR = os.path.join(BASE_DIR, "data", "samples")
+SAMPLES_DIR = os.path.join(os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data"), "samples")
 
 
 def collect_local_samples():
@@ -13,6 +15,8 @@ def collect_local_samples():
                 results.append(json.load(f))
         except Exception:
             continue
+    # bulk-ingested samples (utils/ingest.py) follow the individual files
+    results.extend(iter_samples())
     return results
 if __name__ == "__main__":
     print(len(collect_local_samples()))
@@ -0,0 +1,357 @@
+import glob, json, os, threading, time
+from array import array
+
+from collectors.sample_collector import SAMPLES_DIR
+from collectors.segment_store import SEGMENTS_DIR, SegmentReader, iter_records, manifest_mtime
+
+# Length of the character n-grams stored in the posting lists. Queries shorter
+# than this cannot be answered from postings and fall back to a scan over the
+# in-memory lowercased texts (still no disk I/O).
+NGRAM = 3
+
+# Seconds between full re-stats of every sample file. Adding or removing files
+# changes the directory mtime and is picked up immediately; in-place rewrites of
+# an existing file are only noticed by the periodic full rescan, which runs on
+# a background thread so no request waits for it.
+FULL_RESCAN_INTERVAL = 30.0
+
+
+# written by utils/ingest.py for the extraction step, not part of a served sample
+INTERNAL_KEYS = ('entities', 'extractor')
+
+
+def public_sample(sample):
+    """`sample` without the ingest-only keys, as returned in local_hits."""
+    if not any(k in sample for k in INTERNAL_KEYS):
+        return sample
+    return {k: v for k, v in sample.items() if k not in INTERNAL_KEYS}
+
+
+def _ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _load_sample(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sample = json.load(f)
+    except Exception:
+        return None
+    return sample if isinstance(sample, dict) else None
+
+
+class SampleIndex:
+    """
+    Inverted index over the JSON samples in data/samples and the bulk-ingested
+    samples in the segment store (data/segments, appended after the files).
+
+    Each sample's lowercased text is split into character n-grams and every
+    n-gram maps to the set of sample ids containing it. A substring query is
+    answered by intersecting the posting lists of the query's n-grams and
+    confirming the candidates with a plain `in` check, so the hits are exactly
+    the ones `collect_local_samples` + a linear scan would return, in the same
+    (glob) order.
+
+    File samples are kept in memory. Segment records are not: the index holds
+    their location (segment, offset, length) and array('I') postings, and
+    candidates are read back from the segment files to be confirmed/served.
+    """
+
+    def __init__(self, samples_dir=SAMPLES_DIR, segments_dir=SEGMENTS_DIR):
+        self.samples_dir = samples_dir
+        self.segments_dir = segments_dir
+        self._lock = threading.RLock()
+        self._docs = {}       # doc id -> sample dict
+        self._lower = {}      # doc id -> lowercased sample text (its n-grams are derived from it on removal)
+        self._paths = {}      # path -> (doc id, file mtime)
+        self._postings = {}   # n-gram -> set of doc ids
+        self._rank = {}       # doc id -> position in the last glob listing
+        self._next_id = 0
+        self.version = 0      # bumped on every add/remove, for result-cache invalidation
+        self.removals = 0     # file samples removed or rewritten so far (see samples_since)
+        self._dir_mtime = None
+        self._files = []          # last glob listing, for ranking
+        self._seg_positions = {}  # segment name -> bytes already indexed
+        self._manifest_mtime = None
+        # segment records, numbered in store order
+        self._reader = SegmentReader(segments_dir)
+        self._seg_names = []         # segment number -> file name
+        self._seg_numbers = {}       # file name -> segment number
+        self._seg_seg = array('I')   # record -> segment number
+        self._seg_off = array('Q')   # record -> byte offset
+        self._seg_len = array('I')   # record -> byte length
+        self._seg_postings = {}      # n-gram -> array('I') of record numbers (ascending)
+
+    def __len__(self):
+        return len(self._docs) + len(self._seg_off)
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+    def add_sample(self, sample, path=None, mtime=None):
+        """Index one sample dict; returns its doc id."""
+        with self._lock:
+            if path is not None and path in self._paths:
+                self._remove_doc(self._paths.pop(path)[0])
+            doc_id = self._next_id
+            self._next_id += 1
+            self.version += 1
+            text = sample.get('text', '')
+            lower = text.lower() if isinstance(text, str) else ''
+            self._docs[doc_id] = sample
+            self._lower[doc_id] = lower
+            for g in _ngrams(lower):
+                self._postings.setdefault(g, set()).add(doc_id)
+            if path is not None:
+                self._paths[path] = (doc_id, mtime)
+            # appended after every existing sample until the next refresh re-ranks
+            self._rank[doc_id] = doc_id
+            return doc_id
+
+    def _add_record(self, name, offset, length, sample):
+        """Index one segment record by location; its text is not kept."""
+        num = self._seg_numbers.get(name)
+        if num is None:
+            num = self._seg_numbers[name] = len(self._seg_names)
+            self._seg_names.append(name)
+        rec = len(self._seg_off)
+        self._seg_seg.append(num)
+        self._seg_off.append(offset)
+        self._seg_len.append(length)
+        self.version += 1
+        text = sample.get('text', '')
+        for g in _ngrams(text.lower() if isinstance(text, str) else ''):
+            ids = self._seg_postings.get(g)
+            if ids is None:
+                ids = self._seg_postings[g] = array('I')
+            ids.append(rec)
+
+    def _read_record(self, rec):
+        return self._reader.read(self._seg_names[self._seg_seg[rec]], self._seg_off[rec], self._seg_len[rec])
+
+    def remove_path(self, path):
+        with self._lock:
+            entry = self._paths.pop(path, None)
+            if entry is not None:
+                self._remove_doc(entry[0])
+
+    def _remove_doc(self, doc_id):
+        self.version += 1
+        self.removals += 1
+        for g in _ngrams(self._lower.pop(doc_id, '')):
+            ids = self._postings.get(g)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._postings[g]
+        self._docs.pop(doc_id, None)
+        self._rank.pop(doc_id, None)
+
+    def refresh(self):
+        """
+        Pick up samples added to or removed from the sample directory and
+        records committed to the segment store since the last call. Cheap when
+        nothing changed (two stats); modified files are left to rescan().
+        """
+        with self._lock:
+            try:
+                dir_mtime = os.stat(self.samples_dir).st_mtime_ns
+            except OSError:
+                dir_mtime = None
+            seg_mtime = manifest_mtime(self.segments_dir)
+            if dir_mtime == self._dir_mtime and seg_mtime == self._manifest_mtime:
+                return
+
+            if seg_mtime != self._manifest_mtime:
+                for name, offset, length, sample in iter_records(self.segments_dir, self._seg_positions):
+                    self._add_record(name, offset, length, sample)
+                self._manifest_mtime = seg_mtime
+            if dir_mtime != self._dir_mtime:
+                self._refresh_files()
+                self._dir_mtime = dir_mtime
+            self._rerank()
+
+    def _refresh_files(self):
+        """Sync the set of JSON files in samples_dir: load new files, drop removed ones."""
+        files = glob.glob(os.path.join(self.samples_dir, "*.json"))
+        present = set(files)
+        for p in [p for p in self._paths if p not in present]:
+            self.remove_path(p)
+        for p in files:
+            if p in self._paths:
+                continue
+            try:
+                mtime = os.stat(p).st_mtime_ns
+            except OSError:
+                continue
+            sample = _load_sample(p)
+            if sample is not None:
+                self.add_sample(sample, path=p, mtime=mtime)
+        self._files = files
+
+    def rescan(self):
+        """
+        Full pass for files rewritten in place: every file is stat'ed and
+        changed ones re-read without holding the lock; only applying the
+        changes does.
+        """
+        with self._lock:
+            known = {p: mtime for p, (_, mtime) in self._paths.items()}
+        files = glob.glob(os.path.join(self.samples_dir, "*.json"))
+        changed = {}
+        for p in files:
+            try:
+                mtime = os.stat(p).st_mtime_ns
+            except OSError:
+                continue
+            if known.get(p) != mtime:
+                changed[p] = (mtime, _load_sample(p))
+        with self._lock:
+            for p, (mtime, sample) in changed.items():
+                if sample is None:
+                    # unreadable file: drop any stale copy and retry next rescan
+                    self.remove_path(p)
+                else:
+                    self.add_sample(sample, path=p, mtime=mtime)
+            present = set(files)
+            for p in [p for p in self._paths if p not in present]:
+                self.remove_path(p)
+            self._files = files
+            self._rerank()
+
+    def _rerank(self):
+        # keep results in glob order, like collect_local_samples
+        self._rank = {}
+        for p in self._files:
+            entry = self._paths.get(p)
+            if entry is not None:
+                self._rank[entry[0]] = len(self._rank)
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+    @staticmethod
+    def _intersect(postings, query_lower):
+        """Candidate ids from the postings of the query's n-grams."""
+        lists = []
+        for g in _ngrams(query_lower):
+            ids = postings.get(g)
+            if not ids:
+                return set()
+            lists.append(ids)
+        lists.sort(key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def _candidates(self, query_lower):
+        if len(query_lower) < NGRAM:
+            return list(self._rank)
+        return self._intersect(self._postings, query_lower)
+
+    def _seg_candidates(self, query_lower, n):
+        if len(query_lower) < NGRAM:
+            return range(n)
+        return sorted(r for r in self._intersect(self._seg_postings, query_lower) if r < n)
+
+    def _seg_matches(self, query_lower, records):
+        for rec in records:
+            sample = self._read_record(rec)
+            text = sample.get('text', '') if sample else ''
+            if isinstance(text, str) and query_lower in text.lower():
+                yield sample
+
+    def search(self, query_lower):
+        """Samples whose lowercased text contains `query_lower`, in glob order (segment records last)."""
+        with self._lock:
+            ids = [i for i in self._candidates(query_lower) if query_lower in self._lower[i]]
+            ids.sort(key=self._rank.__getitem__)
+            hits = [self._docs[i] for i in ids]
+            n = len(self._seg_off)
+            records = self._seg_candidates(query_lower, n)
+        # records are append-only, so they are read back without the lock
+        hits.extend(self._seg_matches(query_lower, records))
+        return hits
+
+    def _iter_records(self, n, start=0):
+        for rec in range(start, n):
+            sample = self._read_record(rec)
+            if sample is not None:
+                yield sample
+
+    def scan(self):
+        """(sample, lowercased text) pairs in glob order, for single-pass multi-query matching."""
+        with self._lock:
+            files = [(self._docs[i], self._lower[i]) for i in sorted(self._rank, key=self._rank.__getitem__)]
+            n = len(self._seg_off)
+        yield from files
+        for sample in self._iter_records(n):
+            text = sample.get('text', '')
+            yield sample, text.lower() if isinstance(text, str) else ''
+
+    def marks(self):
+        """Position in the index's history: (next doc id, segment records, removals)."""
+        with self._lock:
+            return self._next_id, len(self._seg_off), self.removals
+
+    def samples_since(self, marks):
+        """
+        (samples indexed after `marks`, current marks), `marks` being an earlier
+        marks(). Only the new segment records are read. The samples are None
+        if a file sample was removed or rewritten since: consumers that cannot
+        subtract have to start over from samples().
+        """
+        with self._lock:
+            current = (self._next_id, len(self._seg_off), self.removals)
+            if marks is None or marks[2] != self.removals:
+                return None, current
+            files = [self._docs[i] for i in sorted(self._rank, key=self._rank.__getitem__) if i >= marks[0]]
+        return files + list(self._iter_records(current[1], start=marks[1])), current
+
+    def samples(self):
+        """All indexed samples, in glob order; segment records are streamed from disk."""
+        with self._lock:
+            files = [self._docs[i] for i in sorted(self._rank, key=self._rank.__getitem__)]
+            n = len(self._seg_off)
+        yield from files
+        yield from self._iter_records(n)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _rescan_loop(index):
+    while True:
+        time.sleep(FULL_RESCAN_INTERVAL)
+        try:
+            index.rescan()
+        except Exception as e:
+            print("[!] Sample rescan failed:", e)
+
+
+def get_sample_index():
+    """Process-wide index, built on first use and refreshed incrementally."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SampleIndex()
+            threading.Thread(target=_rescan_loop, args=(_index,), name="sample-rescan", daemon=True).start()
+        _index.refresh()
+        return _index
+
+
+def sample_index_loaded():
+    return _index is not None
+
+
+def search_local_samples(query_lower):
+    return get_sample_index().search(query_lower)
+
+
+if __name__ == "__main__":
+    idx = get_sample_index()
+    print(len(idx), "samples indexed,", len(idx._postings) + len(idx._seg_postings), "distinct n-grams")
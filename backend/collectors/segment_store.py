@@ -0,0 +1,213 @@
+# Append-only segmented sample store (data/segments).
+#
+# Bulk ingest (utils/ingest.py) writes samples as JSON lines into numbered
+# segment files instead of one JSON file per sample. manifest.json records how
+# many bytes of every segment are committed, plus a resume checkpoint per
+# ingested source; readers never look past the committed length, so a crash
+# mid-append leaves at most an uncommitted tail, which the next writer
+# truncates. Segments are only appended to (a full one is sealed and the next
+# started), so readers follow the store incrementally by remembering how far
+# into each segment they have read.
+import json, os, threading
+
+try:
+    import fcntl
+except ImportError:  # no cross-process lock on this platform
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+SEGMENTS_DIR = os.path.join(os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data"), "segments")
+MANIFEST = "manifest.json"
+LOCK = ".writer.lock"
+MANIFEST_VERSION = 1
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def manifest_path(store_dir=SEGMENTS_DIR):
+    return os.path.join(store_dir, MANIFEST)
+
+
+def manifest_mtime(store_dir=SEGMENTS_DIR):
+    try:
+        return os.stat(manifest_path(store_dir)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_manifest(store_dir=SEGMENTS_DIR):
+    try:
+        with open(manifest_path(store_dir), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+        print(f"[!] Ignoring segment manifest with unknown version in {store_dir}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print("[!] Could not read segment manifest:", e)
+    return {'version': MANIFEST_VERSION, 'segments': [], 'sources': {}}
+
+
+def iter_records(store_dir=SEGMENTS_DIR, positions=None):
+    """
+    (segment name, byte offset, byte length, sample) for every committed
+    record, in store order. If `positions` ({segment name: byte offset}) is
+    given it is advanced in place, so the next call with the same dict only
+    yields records committed since.
+    """
+    positions = {} if positions is None else positions
+    for seg in read_manifest(store_dir)['segments']:
+        start = positions.get(seg['name'], 0)
+        end = seg['bytes']
+        if start >= end:
+            continue
+        try:
+            with open(os.path.join(store_dir, seg['name']), 'rb') as f:
+                f.seek(start)
+                pos = start
+                while pos < end:
+                    line = f.readline()
+                    if not line:
+                        break
+                    offset, pos = pos, pos + len(line)
+                    sample = parse_record(line)
+                    if sample is not None:
+                        yield seg['name'], offset, len(line), sample
+        except OSError as e:
+            print(f"[!] Could not read segment {seg['name']}:", e)
+            continue
+        positions[seg['name']] = end
+
+
+def iter_samples(store_dir=SEGMENTS_DIR, positions=None):
+    """Committed samples in store order (see iter_records)."""
+    for _, _, _, sample in iter_records(store_dir, positions):
+        yield sample
+
+
+def parse_record(line):
+    try:
+        sample = json.loads(line)
+    except ValueError:
+        return None
+    return sample if isinstance(sample, dict) else None
+
+
+class SegmentReader:
+    """Random access to committed records by (segment, offset, length); file handles are kept open."""
+
+    def __init__(self, store_dir=SEGMENTS_DIR):
+        self.store_dir = store_dir
+        self._fds = {}
+        self._lock = threading.Lock()
+
+    def _fd(self, name):
+        fd = self._fds.get(name)
+        if fd is None:
+            with self._lock:
+                fd = self._fds.get(name)
+                if fd is None:
+                    fd = self._fds[name] = os.open(os.path.join(self.store_dir, name), os.O_RDONLY)
+        return fd
+
+    def read(self, name, offset, length):
+        # pread: no shared file position, so concurrent requests need no lock
+        return parse_record(os.pread(self._fd(name), length, offset))
+
+    def close(self):
+        with self._lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds = {}
+
+
+class SegmentWriter:
+    """
+    Appends samples to the store; nothing is visible to readers until commit().
+    One writer at a time: a second one raises instead of interleaving with the
+    first in the same segment and manifest.
+    """
+
+    def __init__(self, store_dir=SEGMENTS_DIR, max_bytes=SEGMENT_MAX_BYTES):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        os.makedirs(store_dir, exist_ok=True)
+        self._lock_file = open(os.path.join(store_dir, LOCK), 'a+')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._lock_file.close()
+                raise RuntimeError(f"another ingest is writing to {store_dir}")
+        self.manifest = read_manifest(store_dir)
+        self._f = None
+        segs = self.manifest['segments']
+        if segs:
+            # drop whatever a crashed writer appended after its last commit
+            path = os.path.join(store_dir, segs[-1]['name'])
+            if os.path.exists(path) and os.path.getsize(path) > segs[-1]['bytes']:
+                with open(path, 'r+b') as f:
+                    f.truncate(segs[-1]['bytes'])
+
+    def _active(self):
+        segs = self.manifest['segments']
+        if self._f is not None and segs[-1]['bytes'] < self.max_bytes:
+            return segs[-1]
+        if self._f is not None:
+            self._f.close()
+        if segs and segs[-1]['bytes'] < self.max_bytes:
+            seg = segs[-1]
+            self._f = open(os.path.join(self.store_dir, seg['name']), 'ab')
+        else:
+            seg = {'name': f"seg-{len(segs) + 1:06d}.jsonl", 'records': 0, 'bytes': 0}
+            segs.append(seg)
+            # 'wb': an uncommitted file from a crashed run may already exist
+            self._f = open(os.path.join(self.store_dir, seg['name']), 'wb')
+        return seg
+
+    def append(self, samples):
+        for sample in samples:
+            line = (json.dumps(sample, ensure_ascii=False) + "\n").encode('utf-8')
+            seg = self._active()
+            self._f.write(line)
+            seg['bytes'] += len(line)
+            seg['records'] += 1
+
+    def commit(self, source=None, checkpoint=None):
+        """Make everything appended so far durable and visible (optionally with a resume checkpoint)."""
+        if self._f is not None:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+        if source is not None:
+            self.manifest['sources'][source] = checkpoint
+        path = manifest_path(self.store_dir)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        if self._lock_file is not None:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    m = read_manifest()
+    print(len(m['segments']), "segments,", sum(s['records'] for s in m['segments']), "samples")
+    for src, cp in m['sources'].items():
+        print(f"  {src}: {cp.get('offset')}/{cp.get('size')} bytes, {cp.get('records')} records")
@@ -0,0 +1,245 @@
+import atexit, hashlib, json, os, sqlite3, threading, time
+from collections import OrderedDict
+
+from extractors.entities import extract, extract_many, EXTRACTOR_VERSION
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+CACHE_PATH = os.path.join(os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data"), "extract_cache.sqlite")
+
+MEMORY_ENTRIES = 4096               # in-memory LRU tier, number of results
+DISK_MAX_BYTES = 256 * 1024 * 1024  # on-disk tier, evicted down to 90% when exceeded
+ACCESS_FLUSH_ENTRIES = 256          # disk-hit access times buffered before one batched UPDATE
+COMMIT_EVERY = 64                   # disk puts per transaction ...
+COMMIT_INTERVAL_S = 2.0             # ... or this long since the last commit, whichever comes first
+BUSY_TIMEOUT_S = 2.0                # wait this long on another process's write lock, then skip the disk tier
+
+
+def cache_key(text, version=EXTRACTOR_VERSION):
+    """Content address of an extraction: the text plus the model/regex version."""
+    h = hashlib.sha256()
+    h.update(version.encode('utf-8'))
+    h.update(b"\0")
+    h.update((text or "").encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+
+def _copy(entities):
+    return {k: list(v) for k, v in entities.items()}
+
+
+class ExtractionCache:
+    """
+    Two-tier cache for `extract` results: an LRU dict in front of a SQLite
+    table that survives restarts. Keys are content hashes, so a changed text or
+    a new model/regex version simply misses and nothing needs invalidating.
+
+    The table may be shared by several worker processes: it runs in WAL mode,
+    puts are committed in batches, and a locked database ("database is
+    locked") is treated as a miss or a skipped write rather than an error.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_entries=MEMORY_ENTRIES, disk_max_bytes=DISK_MAX_BYTES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._mem = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_busy': 0}
+        self._db = None
+        self._disk_bytes = 0
+        self._accessed = {}  # key -> access time of disk hits not yet written back
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")  # readers never wait on the writer
+                self._db.execute("PRAGMA synchronous=NORMAL")  # a lost tail of a cache is only misses
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS extractions ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                    " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS extractions_accessed ON extractions(accessed)")
+                self._db.commit()
+                self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+            except sqlite3.Error as e:
+                print("[!] Extraction cache disk tier disabled:", e)
+                self._db = None
+            else:
+                atexit.register(self.flush)
+
+    # ----------------------------
+    # Tiers
+    # ----------------------------
+    def _mem_put(self, key, entities):
+        self._mem[key] = entities
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_entries:
+            self._mem.popitem(last=False)
+
+    def _busy(self, e):
+        """Count a lock timeout from another process; any other OperationalError is re-raised."""
+        if 'locked' not in str(e) and 'busy' not in str(e):
+            raise e
+        if not self.stats['disk_busy']:
+            print("[!] Extraction cache database busy, skipping the disk tier for now:", e)
+        self.stats['disk_busy'] += 1
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT value FROM extractions WHERE key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError as e:
+            self._busy(e)
+            return None
+        if row is None:
+            return None
+        # access times only order eviction: buffer them instead of a write per read
+        self._accessed[key] = time.time()
+        if len(self._accessed) >= ACCESS_FLUSH_ENTRIES:
+            try:
+                self._flush_accessed()
+                self._commit()
+            except sqlite3.OperationalError as e:
+                self._busy(e)
+        return json.loads(row[0])
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._db.executemany("UPDATE extractions SET accessed = ? WHERE key = ?",
+                                 [(t, k) for k, t in self._accessed.items()])
+            self._accessed = {}
+
+    def _disk_put(self, key, entities):
+        if self._db is None:
+            return
+        value = json.dumps(entities)
+        size = len(key) + len(value)
+        try:
+            old = self._db.execute("SELECT size FROM extractions WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            self._uncommitted += 1
+            if self._disk_bytes > self.disk_max_bytes:
+                self._flush_accessed()  # before eviction reads the order
+                self._evict(int(self.disk_max_bytes * 0.9))
+            if self._uncommitted >= COMMIT_EVERY or time.monotonic() - self._last_commit >= COMMIT_INTERVAL_S:
+                self._flush_accessed()
+                self._commit()
+        except sqlite3.OperationalError as e:
+            self._busy(e)  # still in memory; uncommitted rows are retried with the next commit
+
+    def _commit(self):
+        self._db.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def _evict(self, target):
+        rows = self._db.execute("SELECT key, size FROM extractions ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            self._db.execute("DELETE FROM extractions WHERE key = ?", (key,))
+            self._disk_bytes -= size
+            self.stats['evictions'] += 1
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def get(self, key):
+        with self._lock:
+            entities = self._mem.get(key)
+            if entities is not None:
+                self._mem.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return _copy(entities)
+            entities = self._disk_get(key)
+            if entities is not None:
+                self._mem_put(key, entities)
+                self.stats['disk_hits'] += 1
+                return _copy(entities)
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, entities):
+        entities = _copy(entities)
+        with self._lock:
+            self._mem_put(key, entities)
+            self._disk_put(key, entities)
+
+    def extract(self, text):
+        """Cached equivalent of `extractors.entities.extract`."""
+        key = cache_key(text)
+        entities = self.get(key)
+        if entities is None:
+            entities = extract(text)
+            self.put(key, entities)
+        return entities
+
+    def extract_many(self, texts, n_process=1, batch_size=64):
+        """Cached equivalent of `extract_many`; only the misses go through spaCy."""
+        keys = [cache_key(t) for t in texts]
+        results = [self.get(k) for k in keys]
+        todo = {}
+        for i, entities in enumerate(results):
+            if entities is None:
+                todo.setdefault(keys[i], []).append(i)
+        if todo:
+            miss_keys = list(todo)
+            fresh = extract_many([texts[todo[k][0]] for k in miss_keys], n_process=n_process, batch_size=batch_size)
+            for key, entities in zip(miss_keys, fresh):
+                self.put(key, entities)
+                for i in todo[key]:
+                    results[i] = _copy(entities)
+            self.flush()
+        return results
+
+    def flush(self):
+        """Commit buffered puts and access times to the disk tier."""
+        with self._lock:
+            if self._db is None or not (self._uncommitted or self._accessed):
+                return
+            try:
+                self._flush_accessed()
+                self._commit()
+            except sqlite3.OperationalError as e:
+                self._busy(e)
+
+    def info(self):
+        with self._lock:
+            return dict(self.stats, memory_entries=len(self._mem), disk_bytes=self._disk_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self._accessed = {}
+            if self._db is not None:
+                self._db.execute("DELETE FROM extractions")
+                self._commit()
+            self._disk_bytes = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
+
+
+def cached_extract(text):
+    return get_extraction_cache().extract(text)
+
+
+def cached_extract_many(texts, n_process=1, batch_size=64):
+    return get_extraction_cache().extract_many(texts, n_process=n_process, batch_size=batch_size)
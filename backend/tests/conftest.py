@@ -0,0 +1,4 @@
+import os, sys
+
+# tests import the backend modules the way the app does (run from anywhere)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from collectors.sample_index import SampleIndex
+from collectors.segment_store import SegmentWriter
+from utils.dataset_index import ColumnIndex, FrameIndex
+from utils.multimatch import AhoCorasick
+
+VALUES = ["darklion99@protonmail.com", "dark.lion+tag@gmail.com", "(ghost)byte@example.com",
+          "a.c@x.io", "abc@x.io", "+1 (555) 010-2030", "lion", "", None, 12345, 3.5,
+          "Zero Day <ZeroDay@Tutanota.com>", "ünïcödé@example.com", "a+b(c).d"]
+QUERIES = ["dark", "lion", "lion+", "+", "(", ")", ".", "a.c", "+1 (555)", "(ghost)", "@x.io",
+           "zeroday@tut", "none", "nan", "123", "3.5", "ünï", "a+b(c).d", "b(c", "xyz", ""]
+
+
+def _brute_force(series, q):
+    lowered = series.astype(str).str.lower()
+    return set(lowered.index[lowered.str.contains(q, regex=False)].tolist())
+
+
+def _random_values(rng, n):
+    alphabet = "ab.+(c)@ 1"
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 10))) for _ in range(n)]
+
+
+def test_column_index_matches_str_contains():
+    rng = random.Random(7)
+    series = pd.Series(VALUES + _random_values(rng, 500))
+    queries = QUERIES + [''.join(rng.choice("ab.+(c)@ 1") for _ in range(rng.randint(1, 5))) for _ in range(200)]
+    index = ColumnIndex(series, exact=True)
+    many = index.contains_many(queries)
+    for q, found in zip(queries, many):
+        expected = _brute_force(series, q)
+        assert index.contains(q) == expected, q
+        assert found == expected, q
+
+
+def test_frame_index_matches_boolean_mask():
+    df = pd.DataFrame({'email': VALUES, 'username': list(reversed(VALUES))})
+    index = FrameIndex(df, ['email', 'username'])
+    for q in QUERIES:
+        mask = (df['email'].astype(str).str.lower().str.contains(q, regex=False)
+                | df['username'].astype(str).str.lower().str.contains(q, regex=False))
+        assert index.contains(q).equals(df[mask]), q
+    assert index.positions_contains_many(QUERIES) == [index.positions_contains(q) for q in QUERIES]
+
+
+def test_aho_corasick_finds_every_occurring_pattern():
+    patterns = [q for q in QUERIES if q]
+    ac = AhoCorasick(patterns)
+    ac.build()
+    for text in (str(v).lower() for v in VALUES):
+        assert set(ac.find(text)) == {i for i, p in enumerate(patterns) if p in text}, text
+
+
+def test_sample_index_search_matches_substring(tmp_path):
+    samples, segments = tmp_path / "samples", tmp_path / "segments"
+    samples.mkdir()
+    texts = [v for v in VALUES if isinstance(v, str)]
+    for i, text in enumerate(texts):
+        (samples / f"s{i:02d}.json").write_text(json.dumps({'id': f"s{i}", 'source': 'test', 'text': text}))
+    with SegmentWriter(str(segments)) as w:
+        w.append([{'id': f"seg{i}", 'text': text} for i, text in enumerate(texts)])
+        w.commit()
+    idx = SampleIndex(str(samples), str(segments))
+    idx.refresh()
+    # files come back in glob order, then segment records in store order
+    file_texts = [texts[int(os.path.basename(p)[1:3])] for p in glob.glob(os.path.join(str(samples), "*.json"))]
+    for q in QUERIES:
+        q = q.lower()
+        expected = [t for t in file_texts if q in t.lower()] + [t for t in texts if q in t.lower()]
+        assert [s['text'] for s in idx.search(q)] == expected, q
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("spacy")
+entities = pytest.importorskip("extractors.entities")
+
+try:
+    entities.get_nlp()
+except OSError:
+    pytest.skip("spaCy model en_core_web_sm is not installed", allow_module_level=True)
+
+TEXTS = [
+    "Contact john.doe@example.com or +919876543210 about the wallet bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh",
+    "Satya Nadella announced that Microsoft acquired GitHub.",
+    "",
+    None,
+    "no entities here",
+    "Reach Alice Smith at alice@corp.io; Bob at 09876543210.",
+] * 30  # long enough for more than one nlp.pipe batch
+
+
+def _sorted(result):
+    return {k: sorted(v) for k, v in result.items()}
+
+
+def test_extract_many_matches_extract():
+    expected = [_sorted(entities.extract(t)) for t in TEXTS]
+    assert [_sorted(r) for r in entities.extract_many(TEXTS)] == expected
+
+
+def test_extract_many_small_batches_match_extract():
+    texts = TEXTS[:12]
+    expected = [_sorted(entities.extract(t)) for t in texts]
+    assert [_sorted(r) for r in entities.extract_many(texts, batch_size=4)] == expected
+
+
+def test_extract_many_empty():
+    assert entities.extract_many([]) == []
@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip("networkx")
+pytest.importorskip("pandas")
+
+from utils.entity_graph import EntityGraph
+
+
+def _graph():
+    g = EntityGraph()
+    g.add_record(('sample', 1), [('email', 'darklion99@protonmail.com'), ('phone', '+1 555 0100'), ('name', 'John Smith')])
+    g.add_record(('sample', 2), [('username', 'darklion99'), ('wallet', 'bc1qexample')])
+    g.add_record(('sample', 3), [('email', 'jsmith@corp.io'), ('name', 'John Smith')])
+    return g
+
+
+def test_email_local_part_is_not_unioned_with_username():
+    clusters = _graph().lookup('darklion99')
+    assert len(clusters) == 2
+    assert all(c['size'] == 2 for c in clusters)
+
+
+def test_names_do_not_merge_clusters():
+    clusters = _graph().lookup('john smith')
+    values = [{e['value'] for e in c['entities']} for c in clusters]
+    assert {'darklion99@protonmail.com', '+1 555 0100'} in values
+    assert {'jsmith@corp.io'} in values
+
+
+def test_lookup_is_bounded():
+    g = EntityGraph()
+    g.add_record(('sample', 1), [('email', f'user{i}@example.com') for i in range(30)])
+    (cluster,) = g.lookup('user0@example.com', max_entities=5)
+    assert cluster['size'] == 30
+    assert cluster['truncated'] and len(cluster['entities']) == 5
+
+
+def test_dataset_phone_links_to_sample_phone():
+    pytest.importorskip("flask")
+    import io
+    import app
+
+    df = app.read_dataset_csv(io.StringIO(
+        "email,username,phone\n"
+        "darklion99@protonmail.com,darklion99,+919876543210\n"
+        "lowkey1@example.com,lowkey1,\n"))
+    g = EntityGraph()
+    g.add_frame(df, 'actor')
+    g.add_extracted(('sample', 's1'), {'phones': ['+919876543210'], 'emails': ['user123@gmail.com']})
+    (cluster,) = g.lookup('+919876543210')
+    values = {e['value'] for e in cluster['entities']}
+    assert {'darklion99@protonmail.com', 'darklion99', '+919876543210', 'user123@gmail.com'} <= values
+
+
+def test_sync_folds_in_only_new_samples(tmp_path, monkeypatch):
+    pytest.importorskip("flask")
+    import app
+    from collectors.sample_index import SampleIndex
+    from collectors.segment_store import SegmentWriter
+
+    (tmp_path / "samples").mkdir()
+    segments = str(tmp_path / "segments")
+    idx = SampleIndex(str(tmp_path / "samples"), segments)
+    d = app.Datasets({}, 'test')
+    monkeypatch.setattr(app, "get_sample_index", lambda: idx)
+    monkeypatch.setattr(app, "get_datasets", lambda: d)
+    monkeypatch.setattr(app, "ENTITY_GRAPH_PATH", str(tmp_path / "entity_graph.pkl"))
+    monkeypatch.setattr(app, "schedule_graph_save", lambda: None)
+    for name in ("entity_graph", "_graph_marks", "_graph_samples_version"):
+        monkeypatch.setattr(app, name, None)
+
+    def record(i, phone, email):
+        # carries its extraction, as utils/ingest.py writes it, so no model is needed
+        return {'id': f'seg:{i}', 'text': f'{phone} {email}', 'extractor': app.EXTRACTOR_VERSION,
+                'entities': {'emails': [email], 'phones': [phone], 'wallets': [], 'names': []}}
+
+    with SegmentWriter(segments) as w:
+        w.append([record(0, '+919876543210', 'darklion99@protonmail.com')])
+        w.commit()
+    idx.refresh()
+    assert len(app.sync_entity_graph()) == 2
+
+    def full_read():
+        raise AssertionError("incremental sync read every sample")
+    monkeypatch.setattr(idx, "samples", full_read)
+    with SegmentWriter(segments) as w:
+        w.append([record(1, '+919876543210', 'user123@gmail.com')])
+        w.commit()
+    idx.refresh()
+    (cluster,) = app.sync_entity_graph().lookup('user123@gmail.com')
+    assert cluster['size'] == 3
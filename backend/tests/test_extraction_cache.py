@@ -0,0 +1,43 @@
+import sqlite3
+
+from extractors import cache as cache_mod
+from extractors.cache import ExtractionCache
+
+ENTITIES = {'emails': ['darklion99@protonmail.com'], 'phones': []}
+
+
+def test_locked_database_is_a_skipped_write_not_an_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'BUSY_TIMEOUT_S', 0.05)
+    path = str(tmp_path / "cache.sqlite")
+    c = ExtractionCache(path=path, memory_entries=1)
+    other = sqlite3.connect(path, timeout=0.05)
+    other.execute("BEGIN IMMEDIATE")  # another worker holds the write lock
+    c.put('k1', ENTITIES)
+    c.put('k2', ENTITIES)
+    assert c.get('k2') == ENTITIES  # still served from memory
+    assert c.get('k1') is None  # the disk write was skipped: a miss, not an error
+    c.flush()
+    assert c.stats['disk_busy'] > 0
+    other.rollback()
+    c.put('k3', ENTITIES)
+    c.flush()
+    keys = {k for (k,) in other.execute("SELECT key FROM extractions")}
+    assert 'k3' in keys
+
+
+def test_puts_are_committed_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_mod, 'COMMIT_EVERY', 3)
+    monkeypatch.setattr(cache_mod, 'COMMIT_INTERVAL_S', 3600)
+    path = str(tmp_path / "cache.sqlite")
+    c = ExtractionCache(path=path)
+    reader = sqlite3.connect(path)
+    count = lambda: reader.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+    c.put('a', ENTITIES)
+    c.put('b', ENTITIES)
+    assert count() == 0
+    c.put('c', ENTITIES)
+    assert count() == 3
+    c.put('d', ENTITIES)
+    c.flush()
+    assert count() == 4
+    assert ExtractionCache(path=path).get('d') == ENTITIES
@@ -0,0 +1,29 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.fuzzy_index import HandleIndex, bands_for
+
+
+def test_bands_follow_threshold():
+    assert bands_for(0.5, 64) == 32
+    assert bands_for(0.3, 64) == 64
+    assert HandleIndex(threshold=0.5).rows == 2
+
+
+def test_near_handles_are_found_and_confirmed():
+    idx = HandleIndex(threshold=0.5)
+    for h in ('darklion99', 'darkl1on99', 'dark_lion', 'sunflower', 'jsmith'):
+        idx.add(h, 'users', 'username')
+    idx.build()
+    found = {m['handle']: m['similarity'] for m in idx.query('darklion')}
+    assert 'darklion99' in found and 'dark_lion' in found
+    assert 'sunflower' not in found
+    assert all(sim >= 0.5 for sim in found.values())
+
+
+def test_distant_handles_are_out_of_reach():
+    idx = HandleIndex(threshold=0.5)
+    idx.add('darklion99', 'users', 'username')
+    idx.build()
+    assert idx.query('d_lion') == []
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from utils.ingest import fingerprint, resume_offset
+
+
+def _checkpoint(path, offset, records):
+    head, tail = fingerprint(path, offset)
+    return {'size': os.path.getsize(path), 'offset': offset, 'records': records,
+            'head_sha256': head, 'tail_sha256': tail}
+
+
+def test_appended_dump_resumes_at_the_checkpoint(tmp_path):
+    path = tmp_path / "dump.txt"
+    path.write_bytes(b"first record\n\nsecond record\n\n")
+    cp = _checkpoint(str(path), os.path.getsize(path), 2)
+    with open(path, 'ab') as f:
+        f.write(b"third record\n\n")
+    assert resume_offset(str(path), cp, os.path.getsize(path)) == (cp['offset'], 2)
+
+
+@pytest.mark.parametrize("rewrite", [
+    b"first record\n\nchanged record\n\n",   # same length, edited before the checkpoint
+    b"other first\n\nsecond record\n\nmore\n\n",
+    b"first\n\n",                            # shrank
+])
+def test_rewritten_dump_is_refused(tmp_path, rewrite):
+    path = tmp_path / "dump.txt"
+    path.write_bytes(b"first record\n\nsecond record\n\n")
+    cp = _checkpoint(str(path), os.path.getsize(path), 2)
+    path.write_bytes(rewrite)
+    with pytest.raises(RuntimeError, match="--restart"):
+        resume_offset(str(path), cp, os.path.getsize(path))
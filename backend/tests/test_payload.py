@@ -0,0 +1,25 @@
+from utils.payload import Options, shape
+
+
+def _profile(n=6):
+    hits = [{'source': 'local', 'id': f'doc{i}', 'text': f'text {i}'} for i in range(n)]
+    clusters = [{'occurrences': [dict(h, timestamp=None)]} for h in reversed(hits)]
+    return {'query': 'q', 'local_hits': hits, 'clusters': clusters}
+
+
+def test_compact_hit_refs_point_into_the_returned_page():
+    for offset, limit in ((0, 3), (2, 3), (3, 10), (1, None)):
+        out = shape(_profile(), Options(compact=True, limit=limit, offset=offset))
+        hits = out['local_hits']
+        for cluster in out['clusters']:
+            for occ in cluster['occurrences']:
+                if 'hit' in occ:
+                    assert hits[occ['hit']]['id'] == occ['id']
+                else:
+                    assert occ['id'] not in {h['id'] for h in hits}
+
+
+def test_compact_without_local_hits_has_no_hit_refs():
+    out = shape(_profile(), Options(compact=True, fields=('clusters',)))
+    assert 'local_hits' not in out
+    assert all('hit' not in occ for c in out['clusters'] for occ in c['occurrences'])
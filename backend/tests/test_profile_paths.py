@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("flask")
+pytest.importorskip("networkx")
+
+import app
+from collectors.sample_index import SampleIndex
+from utils import snapshot
+from utils.rollups import Rollups
+
+BREACHES = """Entity;Alternative Name;Story;Year;Records Lost;METHOD OF LEAK
+First Bank;FirstBk;First Bank lost customer records.;2014;1500000;hacked
+Metro Health;;Patient data (a.c) exposed.;2016;Unknown;poor security
+Union Bank 7;UBank;Second bank breach;2012;;inside job
+"""
+PERSON = """email,username,breach_source,year,data_exposed
+darklion99@protonmail.com,darklion99,LinkedIn,2021,"email, password"
+jsmith@corp.io,jsmith,Adobe,,email
+,ghost_byte,Canva,2019,"email, phone"
+"""
+ACTOR = """email,username,phone,platform,year,activity_type,risk_level,confidence,note
+darklion99@protonmail.com,darklion99,+919876543210,Telegram,2022,data trading,High,0.9,creds
+lowkey1@example.com,lowkey1,,GitHub,2020,tech contributor,Low,0.4,code
+redviper5@yahoo.com,redviper5,+15550100,DarkForum,2023,malware dev,Critical,0.0,tools
+"""
+PERSON_APPEND = """darklion99@protonmail.com,darklion99,Dropbox,2016,"email, phone"
+new.user@example.com,newuser,Canva,2020,email
+"""
+ACTOR_APPEND = """lowkey1@example.com,lowkey1,+447700900123,Reddit,2021,spam marketing,Medium,0.5,ads
+darklion99@protonmail.com,darklion_alt,,Telegram,2024,data trading,High,0.7,more creds
+"""
+QUERIES = ["darklion99@protonmail.com", "darklion", "bank", "lion", "a.c", "(bank", "lowkey1", "xy",
+           "nothing-matches-this"]
+
+
+def dumps(profile):
+    return app.app.json.dumps(profile)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    (tmp_path / "Data_Breaches_EN_V2_2004_2017_20180220.csv").write_text(BREACHES, encoding="utf-8")
+    (tmp_path / "person_breaches.csv").write_text(PERSON, encoding="utf-8")
+    (tmp_path / "dummy_actor_intelligence.csv").write_text(ACTOR, encoding="utf-8")
+    (tmp_path / "samples").mkdir()
+    (tmp_path / "segments").mkdir()
+    monkeypatch.setattr(app, "KAGGLE_PATH", str(tmp_path / "Data_Breaches_EN_V2_2004_2017_20180220.csv"))
+    monkeypatch.setattr(app, "PERSON_PATH", str(tmp_path / "person_breaches.csv"))
+    monkeypatch.setattr(app, "PERSON_DUMMY_PATH", str(tmp_path / "dummy_person_breaches.csv"))
+    monkeypatch.setattr(app, "ACTOR_PATH", str(tmp_path / "dummy_actor_intelligence.csv"))
+    monkeypatch.setattr(app, "ROLLUPS_PATH", str(tmp_path / "rollups.pkl"))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    # no local samples: their clusters would need the spaCy model
+    samples = SampleIndex(str(tmp_path / "samples"), str(tmp_path / "segments"))
+    monkeypatch.setattr(app, "get_sample_index", lambda: samples)
+    monkeypatch.setattr(app, "search_local_samples", lambda q: [])
+    monkeypatch.setattr(app, "datasets", app.Datasets(app.load_frames(), app.datasets_signature()))
+    app.profile_cache.clear()
+    return tmp_path
+
+
+def test_concurrent_and_streamed_profiles_match_build_profile(data_dir):
+    d = app.get_datasets()
+    assert app.build_profile("darklion", concurrent=False, d=d)['actor_intel']
+    for q in QUERIES:
+        expected = dumps(app.build_profile(q, concurrent=False, d=d))
+        assert dumps(app.build_profile(q, concurrent=True, d=d)) == expected, q
+        streamed = app.assemble_profile(dict(app.iter_profile_sections(q, concurrent=True, d=d), query=q))
+        assert dumps(streamed) == expected, q
+
+
+def test_api_endpoints_match_build_profile(data_dir):
+    client = app.app.test_client()
+    for q in QUERIES:
+        expected = dumps(app.build_profile(q, concurrent=False))
+        for concurrent in ('0', '1'):
+            resp = client.get('/api/profile', query_string={'q': q, 'concurrent': concurrent})
+            assert resp.status_code == 200
+            assert dumps(app.app.json.loads(resp.get_data())) == expected, (q, concurrent)
+        resp = client.get('/api/profile/stream', query_string={'q': q})
+        lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        streamed = app.assemble_profile({line['section']: line['data'] for line in lines})
+        assert dumps(streamed) == expected, q
+
+
+def test_batch_profiles_match_build_profile(data_dir):
+    batch = list(app.iter_profiles_batch(QUERIES + [" Bank ", "DARKLION"]))
+    assert [q for q, _ in batch] == QUERIES + ["Bank", "DARKLION"]
+    for q, profile in batch:
+        assert dumps(profile) == dumps(app.build_profile(q, concurrent=False)), q
+
+
+def _sync(r, d):
+    return {name: r.sync(name, d.row_count(name), lambda start, name=name: d.chunks(name, start),
+                         app.dataset_source(name), app.rollup_keys(name, getattr(d, name)))
+            for name in app.DATASET_NAMES}
+
+
+def test_incremental_rollups_after_append_match_full_rebuild(data_dir):
+    r = Rollups()
+    assert set(_sync(r, app.Datasets(app.load_frames(), app.datasets_signature())).values()) == {'appended'}
+    with open(app.PERSON_PATH, 'a', encoding='utf-8') as f:
+        f.write(PERSON_APPEND)
+    with open(app.ACTOR_PATH, 'a', encoding='utf-8') as f:
+        f.write(ACTOR_APPEND)
+
+    d = app.Datasets(app.load_frames(), app.datasets_signature())
+    assert _sync(r, d) == {'breaches': 'unchanged', 'person': 'appended', 'actor': 'appended'}
+    full = Rollups()
+    _sync(full, d)
+    assert r.entities == full.entities
+    assert r.get('email', 'darklion99@protonmail.com')['total_rows'] == 4
@@ -0,0 +1,50 @@
+import json
+import os
+
+from collectors.sample_index import SampleIndex
+from collectors.segment_store import SegmentWriter
+
+
+def _write_sample(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'id': name, 'source': 'test', 'text': text}, f)
+    return path
+
+
+def _index(tmp_path):
+    samples, segments = tmp_path / "samples", tmp_path / "segments"
+    samples.mkdir()
+    segments.mkdir()
+    return SampleIndex(str(samples), str(segments)), str(samples), str(segments)
+
+
+def test_samples_since_returns_only_new_samples(tmp_path):
+    idx, samples, segments = _index(tmp_path)
+    _write_sample(samples, "a.json", "first darklion99")
+    with SegmentWriter(segments) as w:
+        w.append([{'id': 'seg:0', 'text': 'record one'}])
+        w.commit()
+    idx.refresh()
+    added, marks = idx.samples_since(None)
+    assert added is None
+    assert idx.samples_since(marks) == ([], marks)
+
+    _write_sample(samples, "b.json", "second sample")
+    with SegmentWriter(segments) as w:
+        w.append([{'id': 'seg:1', 'text': 'record two'}])
+        w.commit()
+    os.utime(samples, ns=(1, 1))  # make sure the directory mtime moves
+    idx.refresh()
+    added, marks = idx.samples_since(marks)
+    assert sorted(s['id'] for s in added) == ['b.json', 'seg:1']
+
+
+def test_samples_since_reports_removals(tmp_path):
+    idx, samples, _ = _index(tmp_path)
+    path = _write_sample(samples, "a.json", "to be removed")
+    idx.refresh()
+    marks = idx.marks()
+    idx.remove_path(path)
+    added, _ = idx.samples_since(marks)
+    assert added is None
@@ -0,0 +1,70 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("flask")
+pytest.importorskip("networkx")
+
+import app
+
+NAN = float('nan')
+
+
+def _outcome(func, arg):
+    # the frame paths must also fail where the dict paths fail
+    try:
+        return 'ok', func(arg)
+    except Exception as e:
+        return 'error', type(e).__name__
+
+
+BREACH_FRAMES = [
+    {'Records Lost': [1_500_000, 20_000_000, 0]},
+    {'Records Lost': [NAN, 3_000_000.0, 250.5]},
+    {'Records Lost': ['Unknown', '12000000', None, '4.5']},
+    {'Records Lost': [0, NAN, 7], 'records_lost': [5_000_000, 9, NAN]},
+    {'records_lost': ['n/a', 2_000_000, 0]},
+    {'Records Lost': pd.Series([None, NAN, '300000000'], dtype=object)},
+    {'Entity': ['ACME']},
+]
+
+
+@pytest.mark.parametrize('columns', BREACH_FRAMES)
+def test_breach_score_frame_matches_records(columns):
+    df = pd.DataFrame(columns)
+    expected = _outcome(app.compute_threat_score_from_breaches, df.to_dict(orient='records'))
+    assert _outcome(app.compute_threat_score_from_frame, df) == expected
+
+
+ACTOR_FRAMES = [
+    {'risk_level': ['High', 'Critical', 'Low'], 'confidence': [0.9, 0.4, 0.75]},
+    {'risk_level': ['High', 'Medium'], 'confidence': [0.0, 0]},
+    {'risk_level': ['High', NAN, 'Bogus'], 'confidence': [0.5, 0.5, 0.5]},
+    {'risk_level': [None, ''], 'risk': ['Critical', None], 'confidence': [0.8, 0.0]},
+    {'risk_level': pd.Series([None, NAN, 'High'], dtype=object), 'confidence': [0.5, 0.5, 0.5]},
+    {'risk_level': ['High', 'Low'], 'confidence': [0.7, NAN]},
+    {'risk_level': ['High', 'Low'], 'confidence': ['0.7', 'high']},
+    {'risk_level': ['High', 'Low']},
+    {'platform': ['forum']},
+]
+
+
+@pytest.mark.parametrize('columns', ACTOR_FRAMES)
+def test_actor_boost_frame_matches_records(columns):
+    df = pd.DataFrame(columns)
+    expected = _outcome(app.actor_boost_from_records, df.to_dict(orient='records'))
+    assert _outcome(app.actor_boost_from_frame, df) == expected
+
+
+def test_empty_frames_score_zero():
+    assert app.compute_threat_score_from_frame(pd.DataFrame({'Records Lost': []})) == 0
+    assert app.actor_boost_from_frame(pd.DataFrame({'confidence': []})) == 0
+
+
+def test_descriptive_report_uses_full_match_count(monkeypatch):
+    monkeypatch.setattr(app, 'RESPONSE_ROW_LIMIT', 2)
+    matches = pd.DataFrame({'Entity': [f'Org {i}' for i in range(5)], 'Records Lost': [10] * 5})
+    profile = {'query': 'org'}
+    profile.update(app.breach_section(matches))
+    assert len(profile['breach_data']) == 2
+    report = app.make_descriptive_report(app.assemble_profile(profile), app.match_counts(profile))
+    assert "breaches found: 5." in report
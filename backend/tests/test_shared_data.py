@@ -0,0 +1,26 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from utils import shared_data
+from utils.dataset_index import ColumnIndex
+
+EMAILS = ["darklion99@protonmail.com", "dark.lion+tag@gmail.com", "(ghost)byte@example.com",
+          "a.c@x.io", "abc@x.io", "", None, "Zero Day <zeroday@tutanota.com>"]
+QUERIES = ["dark", "lion+", "(ghost)", "a.c", ".", "+", "@x.io", "zeroday@tut", "none", "missing", "xyz", ""]
+
+
+def test_shared_postings_match_column_index(tmp_path):
+    df = pd.DataFrame({'email': EMAILS})
+    pointer = shared_data.publish({'person': df}, 'v1', {'person': ['email']}, shared_dir=str(tmp_path))
+    index = shared_data.ArrowFrameIndex(shared_data.attach(pointer, shared_dir=str(tmp_path))['person'],
+                                        ['email'], name='person')
+    shared, local = index.columns['email'], ColumnIndex(df['email'])
+    assert shared.postings is not None
+    for q in QUERIES:
+        assert shared.contains(q) == local.contains(q), q
+    # a generation without postings falls back to the full scan
+    scan = shared_data.ArrowColumnIndex(shared.values)
+    for q in QUERIES:
+        assert scan.contains(q) == local.contains(q), q
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("flask")
+pytest.importorskip("networkx")
+
+try:
+    sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(a, tokenize='trigram')")
+except sqlite3.Error:
+    pytest.skip("SQLite without the FTS5 trigram tokenizer", allow_module_level=True)
+
+import app
+from utils import snapshot
+
+BREACHES = """Entity;Alternative Name;Story;Year;Records Lost;METHOD OF LEAK
+First Bank;FirstBk;First Bank lost customer records.;2014;1500000;hacked
+Metro Health;;Patient data (a.c) exposed.;2016;Unknown;poor security
+Union Bank 7;UBank;Second bank breach;2012;;inside job
+"""
+PERSON = """email,username,breach_source,year,data_exposed
+darklion99@protonmail.com,darklion99,LinkedIn,2021,"email, password"
+jsmith@corp.io,jsmith,Adobe,,email
+,ghost_byte,Canva,2019,"email, phone"
+"""
+ACTOR = """email,username,phone,platform,year,activity_type,risk_level,confidence,note
+darklion99@protonmail.com,darklion99,+919876543210,Telegram,2022,data trading,High,0.9,creds
+lowkey1@example.com,lowkey1,,GitHub,2020,tech contributor,Low,,code
+ Lowkey1@Example.com ,lowkey1,,Reddit,2021,spam marketing,Medium,0.5,ads
+redviper5@yahoo.com,redviper5,+15550100,DarkForum,2023,malware dev,Critical,0.0,tools
+"""
+QUERIES = ["darklion99@protonmail.com", "darklion", "bank", "lion", "a.c", "(bank", "xy", "nothing-matches-this"]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    (tmp_path / "Data_Breaches_EN_V2_2004_2017_20180220.csv").write_text(BREACHES, encoding="utf-8")
+    (tmp_path / "person_breaches.csv").write_text(PERSON, encoding="utf-8")
+    (tmp_path / "dummy_actor_intelligence.csv").write_text(ACTOR, encoding="utf-8")
+    monkeypatch.setattr(app, "KAGGLE_PATH", str(tmp_path / "Data_Breaches_EN_V2_2004_2017_20180220.csv"))
+    monkeypatch.setattr(app, "PERSON_PATH", str(tmp_path / "person_breaches.csv"))
+    monkeypatch.setattr(app, "PERSON_DUMMY_PATH", str(tmp_path / "dummy_person_breaches.csv"))
+    monkeypatch.setattr(app, "ACTOR_PATH", str(tmp_path / "dummy_actor_intelligence.csv"))
+    monkeypatch.setattr(app, "STORE_PATH", str(tmp_path / "datasets.sqlite"))
+    monkeypatch.setattr(app, "ROLLUPS_PATH", str(tmp_path / "rollups.pkl"))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    # the dataset stages are compared; local samples would need the spaCy model
+    monkeypatch.setattr(app, "search_local_samples", lambda q: [])
+    return tmp_path
+
+
+def test_build_profile_matches_between_backends(data_dir):
+    memory = app.Datasets(app.load_frames(), app.datasets_signature())
+    disk = app.open_store_datasets()
+    assert set(disk.store) == {'breaches', 'person', 'actor'}
+    for q in QUERIES:
+        expected = app.app.json.dumps(app.build_profile(q, concurrent=False, d=memory))
+        assert app.app.json.dumps(app.build_profile(q, concurrent=False, d=disk)) == expected, q
+
+
+def test_rollups_match_between_backends(data_dir):
+    memory = app.Datasets(app.load_frames(), app.datasets_signature())
+    disk = app.open_store_datasets()
+    for kind, q in (('email', 'darklion99@protonmail.com'), ('username', 'LOWKEY1'), ('email', 'lowkey1@example.com'),
+                    ('organization', 'first bank'), ('email', 'missing@example.com')):
+        assert disk.rollups.get(kind, q) == memory.rollups.get(kind, q), (kind, q)
+    assert disk.rollups.get('email', 'lowkey1@example.com')['total_rows'] == 2
+
+
+def test_rebuild_is_skipped_when_already_stored(data_dir):
+    app.open_store_datasets()
+    store = app.SqliteStore(app.STORE_PATH)
+    meta = store.meta('person')
+    again = store.build('person', iter(()), lambda df: ([], []), meta['signature'])
+    assert again == meta
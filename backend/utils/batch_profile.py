@@ -0,0 +1,35 @@
+# Batch profiling from the command line (run from backend/):
+#
+#   python -m utils.batch_profile queries.txt -o profiles.ndjson
+#
+# Reads one query (email, username, ...) per line ('-' for stdin) and writes one
+# NDJSON line {"query", "profile"} per query as soon as it is ready, using the
+# same single-pass matcher as POST /api/profile/batch.
+import argparse, sys, time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile many queries in one pass")
+    parser.add_argument("input", help="file with one query per line, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    import app
+    app.resources.warm_up()  # datasets, samples and model load concurrently
+
+    src = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    with src:
+        queries = [line.strip() for line in src if line.strip()]
+
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    start = time.perf_counter()
+    n = 0
+    with out:
+        for q, profile in app.iter_profiles_batch(queries):
+            out.write(app.app.json.dumps({'query': q, 'profile': profile}) + "\n")
+            n += 1
+    print(f"[+] Profiled {n} queries in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+# Scale benchmark for the profile pipeline (run from backend/):
+#
+#   python -m utils.benchmark --sizes 1000,100000 --actor-rows 10000,1000000 -o bench.json
+#   python -m utils.benchmark --sizes 1000 --compare bench.json
+#
+# For every size a synthetic data dir holding all four datasets is generated
+# (utils/make_samples.py, utils/make_actor_dataset.py and
+# utils/make_breach_datasets.py) and a fresh worker process loads it through
+# PROFILER_DATA_DIR, so start-up cost and RSS are measured per dataset size.
+# The worker times dataset load, extract(), build_profile() per query type and
+# POST /api/report, and reports p50/p95/p99 latency, throughput, the resident
+# set size after each stage with the growth during it (rss_mb / rss_delta_mb)
+# and the peak RSS reached during the stage (peak_rss_mb: VmHWM, reset before
+# each stage through /proc/self/clear_refs). All memory figures come from
+# /proc and are None where that is unavailable; peak_rss_mb is also None when
+# the high-water mark cannot be reset, since it would then be the process-wide
+# peak. Results are written as JSON; --compare flags stages whose p50
+# regressed against an earlier run.
+import argparse, itertools, json, math, os, platform, subprocess, sys, tempfile, time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_QUERIES = {
+    "exact_email": "darklion99@protonmail.com",
+    "substring_handle": "lion",
+    "broad_org": "bank",
+}
+REGRESSION_THRESHOLD = 1.2  # p50 more than 20% slower than the baseline
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def proc_status_mb(field):
+    """`field` (e.g. VmRSS, VmHWM) from /proc/self/status in MB, or None without /proc."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 1)  # kB
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    return proc_status_mb("VmRSS")
+
+
+def reset_peak_rss():
+    """Reset VmHWM to the current RSS (Linux >= 4.0); False where that is not possible."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_stats(before, peak_reset=True):
+    after = current_rss_mb()
+    delta = round(after - before, 1) if after is not None and before is not None else None
+    peak = proc_status_mb("VmHWM") if peak_reset else None
+    return {"rss_mb": after, "rss_delta_mb": delta, "peak_rss_mb": peak}
+
+
+def measure(fn, iterations, items=1):
+    """Run fn() `iterations` times; latency stats in ms, throughput in items/s, RSS after, growth and peak."""
+    peak_reset = reset_peak_rss()
+    rss_before = current_rss_mb()
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    total = sum(times) / 1000
+    return {
+        "n": iterations,
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "throughput_per_s": round(iterations * items / total, 2) if total else None,
+        **rss_stats(rss_before, peak_reset),
+    }
+
+
+# ----------------------------
+# Worker: runs inside the process that has the dataset loaded
+# ----------------------------
+def run_worker(args):
+    queries = dict(DEFAULT_QUERIES)
+    for spec in args.query or []:
+        name, _, value = spec.partition("=")
+        queries[name] = value
+    stages = {}
+
+    # a fresh process: its high-water mark so far is start-up, part of the load stage anyway
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    import app
+    app.resources.warm_up()
+    load_ms = (time.perf_counter() - start) * 1000
+    stages["load"] = {"n": 1, "p50_ms": round(load_ms, 3), "p95_ms": round(load_ms, 3),
+                      "p99_ms": round(load_ms, 3), "throughput_per_s": None, **rss_stats(rss_before)}
+
+    from extractors.entities import extract
+    texts = [s.get("text", "") for s in itertools.islice(app.get_sample_index().samples(), args.extract_docs)]
+    if texts:
+        stages["extract"] = measure(lambda: [extract(t) for t in texts], max(1, args.iterations // 10), items=len(texts))
+
+    last_profile = None
+    for name, q in queries.items():
+        for _ in range(args.warmup):
+            app.build_profile(q)
+        holder = {}
+        def run(q=q):
+            holder["p"] = app.build_profile(q)
+        stages[f"build_profile:{name}"] = measure(run, args.iterations)
+        last_profile = holder.get("p") or last_profile
+
+    if last_profile is not None:
+        client = app.app.test_client()
+        counter = iter(range(10 ** 9))
+        def report():
+            # unique input per call so the job queue's dedup does not short-circuit
+            body = dict(last_profile, bench_nonce=next(counter))
+            resp = client.post("/api/report", json=body)
+            assert resp.status_code == 200, resp.status_code
+        stages["report"] = measure(report, max(1, args.iterations // 5))
+
+    json.dump(stages, sys.stdout)
+
+
+# ----------------------------
+# Orchestrator
+# ----------------------------
+def generate(data_dir, samples, actor_rows, seed, dup_ratio, breach_rows, person_rows):
+    env = dict(os.environ, PYTHONPATH=BASE_DIR)
+    subprocess.run([sys.executable, "-m", "utils.make_samples", "-n", str(samples), "--seed", str(seed),
+                    "--dup-ratio", str(dup_ratio), "--out", os.path.join(data_dir, "samples")],
+                   cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run([sys.executable, "-m", "utils.make_actor_dataset", "-n", str(actor_rows), "--seed", str(seed),
+                    "--dup-ratio", str(dup_ratio), "--out", os.path.join(data_dir, "dummy_actor_intelligence.csv")],
+                   cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+    subprocess.run([sys.executable, "-m", "utils.make_breach_datasets", "--breaches", str(breach_rows),
+                    "--persons", str(person_rows), "--seed", str(seed), "--out-dir", data_dir],
+                   cwd=BASE_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def run_size(args, samples, actor_rows):
+    with tempfile.TemporaryDirectory(prefix="profiler-bench-") as data_dir:
+        # breaches and person rows scale with the actor rows (the Kaggle set is ~300 rows)
+        generate(data_dir, samples, actor_rows, args.seed, args.dup_ratio,
+                 breach_rows=max(300, actor_rows // 100), person_rows=actor_rows)
+        cmd = [sys.executable, "-m", "utils.benchmark", "--worker",
+               "--iterations", str(args.iterations), "--warmup", str(args.warmup),
+               "--extract-docs", str(args.extract_docs)]
+        for spec in args.query or []:
+            cmd += ["--query", spec]
+        env = dict(os.environ, PROFILER_DATA_DIR=data_dir, PYTHONPATH=BASE_DIR)
+        out = subprocess.run(cmd, cwd=BASE_DIR, env=env, check=True, capture_output=True, text=True).stdout
+        # the app prints load messages; the stage JSON is the last line
+        return json.loads(out.strip().splitlines()[-1])
+
+
+def compare(current, baseline):
+    base = {(r["samples"], r["actor_rows"]): r["stages"] for r in baseline.get("runs", [])}
+    regressions = []
+    for run in current["runs"]:
+        old = base.get((run["samples"], run["actor_rows"]))
+        if not old:
+            continue
+        for stage, stats in run["stages"].items():
+            if stage in old and old[stage]["p50_ms"]:
+                ratio = stats["p50_ms"] / old[stage]["p50_ms"]
+                flag = "REGRESSION" if ratio > REGRESSION_THRESHOLD else ""
+                print(f"{run['samples']:>9} {run['actor_rows']:>10} {stage:<32} {old[stage]['p50_ms']:>10.2f} -> {stats['p50_ms']:>10.2f} ms  x{ratio:.2f} {flag}")
+                if flag:
+                    regressions.append((run["samples"], run["actor_rows"], stage, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the profile pipeline across dataset sizes")
+    parser.add_argument("--sizes", default="1000", help="comma-separated sample counts")
+    parser.add_argument("--actor-rows", default=None,
+                        help="comma-separated actor row counts, one per size (default: 10x samples)")
+    parser.add_argument("--dup-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--extract-docs", type=int, default=200, help="sample texts per extract() iteration")
+    parser.add_argument("--query", action="append", help="NAME=VALUE, adds or overrides a query type")
+    parser.add_argument("-o", "--output", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline results JSON to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return run_worker(args)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    actor_rows = [int(s) for s in args.actor_rows.split(",")] if args.actor_rows else [10 * s for s in sizes]
+    result = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "iterations": args.iterations,
+            "dup_ratio": args.dup_ratio,
+            "seed": args.seed,
+        },
+        "runs": [],
+    }
+    for samples, rows in zip(sizes, actor_rows):
+        print(f"[*] samples={samples} actor_rows={rows}", file=sys.stderr)
+        stages = run_size(args, samples, rows)
+        result["runs"].append({"samples": samples, "actor_rows": rows, "stages": stages})
+        for stage, s in stages.items():
+            rss = f"rss {s['rss_mb']} MB ({s['rss_delta_mb']:+} MB)" if s.get('rss_delta_mb') is not None else "rss -"
+            peak = f"peak {s['peak_rss_mb']} MB" if s.get('peak_rss_mb') is not None else "peak -"
+            print(f"    {stage:<32} p50 {s['p50_ms']:>10.2f}  p95 {s['p95_ms']:>10.2f}  p99 {s['p99_ms']:>10.2f} ms"
+                  f"  {s['throughput_per_s'] or '-':>10} /s  {rss}  {peak}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"[+] Wrote {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            if compare(result, json.load(f)):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Lookup indexes over the loaded DataFrames, built once at load time so that
+# build_profile does not re-lowercase whole columns on every request.
+from array import array
+
+from utils import metrics
+from utils.multimatch import AhoCorasick
+
+NGRAM = 3
+
+
+def ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def lowered(series):
+    """Same strings the old `.astype(str).str.lower()` filters compared against."""
+    return series.astype(str).str.lower().tolist()
+
+
+class ColumnIndex:
+    """
+    Pre-lowercased values of one column plus n-gram postings (and optionally an
+    exact-match map). Queries are plain substrings, like str.contains(q,
+    regex=False): '.', '+' or '(' in an email or name match themselves.
+    """
+
+    def __init__(self, series, exact=False, name=None):
+        self.name = name
+        self.values = lowered(series)
+        # 4 bytes per posting instead of a boxed int in a list
+        self.postings = {}
+        for pos, v in enumerate(self.values):
+            for g in ngrams(v):
+                ids = self.postings.get(g)
+                if ids is None:
+                    ids = self.postings[g] = array('I')
+                ids.append(pos)
+        self.exact = None
+        if exact:
+            self.exact = {}
+            for pos, v in enumerate(self.values):
+                self.exact.setdefault(v, array('I')).append(pos)
+
+    def __len__(self):
+        return len(self.values)
+
+    def contains(self, q):
+        """Row positions whose value contains `q` (already lowercased)."""
+        if len(q) < NGRAM:
+            metrics.inc('profiler_rows_scanned_total', len(self.values), dataset=self.name)
+            return {pos for pos, v in enumerate(self.values) if q in v}
+        lists = []
+        for g in ngrams(q):
+            ids = self.postings.get(g)
+            if not ids:
+                return set()
+            lists.append(ids)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return candidates
+        metrics.inc('profiler_rows_scanned_total', len(candidates), dataset=self.name)
+        return {pos for pos in candidates if q in self.values[pos]}
+
+    def contains_many(self, queries):
+        """
+        Row positions for each query, from one pass over the column with an
+        Aho-Corasick automaton (an empty query matches every row).
+        """
+        results = [set() for _ in queries]
+        ac = AhoCorasick()
+        ids = []
+        for i, q in enumerate(queries):
+            if not q:
+                results[i] = set(range(len(self.values)))
+            else:
+                ac.add(q)
+                ids.append(i)
+        if ids:
+            ac.build()
+            for pos, v in enumerate(self.values):
+                for pid in ac.find(v):
+                    results[ids[pid]].add(pos)
+        return results
+
+    def equals(self, q):
+        if self.exact is not None:
+            return set(self.exact.get(q, ()))
+        return {pos for pos, v in enumerate(self.values) if v == q}
+
+
+class FrameIndex:
+    """
+    Indexes for the searchable columns of one DataFrame. Lookups return the
+    matching rows as a DataFrame slice in original row order, the same frame a
+    boolean-mask filter over those columns would produce.
+    """
+
+    def __init__(self, df, columns, exact=(), name=None):
+        self.df = df
+        self.name = name
+        self.columns = {}
+        for col in columns:
+            if col is not None and col in df.columns:
+                self.columns[col] = ColumnIndex(df[col], exact=col in exact, name=name)
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def positions_contains(self, q, columns=None):
+        found = set()
+        for col in (columns or self.columns):
+            if col in self.columns:
+                found |= self.columns[col].contains(q)
+        return sorted(found)
+
+    def positions_contains_many(self, queries, columns=None):
+        found = [set() for _ in queries]
+        for col in (columns or self.columns):
+            if col in self.columns:
+                for acc, hits in zip(found, self.columns[col].contains_many(queries)):
+                    acc |= hits
+        return [sorted(f) for f in found]
+
+    def positions_equal(self, col, q):
+        if col not in self.columns:
+            return []
+        return sorted(self.columns[col].equals(q))
+
+    def rows(self, positions):
+        return self.df.iloc[positions]
+
+    def contains(self, q, columns=None):
+        return self.rows(self.positions_contains(q, columns))
+
+    def equal(self, col, q):
+        return self.rows(self.positions_equal(col, q))
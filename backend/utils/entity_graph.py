@@ -0,0 +1,225 @@
+# Cross-source entity correlation graph.
+#
+# Nodes are identifiers (email, username, phone, wallet, name); an edge means two
+# identifiers appeared in the same sample or dataset record. Connected
+# components of the strong identifiers are maintained incrementally with
+# union-find, so the whole linked cluster of an identifier is available without
+# rescanning anything. Names come from NER and collide across unrelated people,
+# so they get edges but never merge clusters: a name resolves to the clusters
+# of the identifiers it was seen with. Likewise an email's local part is not
+# unioned with the username of the same spelling (j.smith@a.com and j.smith@b.com
+# need not be one person); lookup() returns the emails with that local part as
+# clusters of their own, which is how a handle such as darklion99 still reaches
+# darklion99@protonmail.com.
+import heapq, os, pickle, re, threading
+
+import networkx as nx
+import pandas as pd
+
+NODE_TYPES = ('email', 'username', 'phone', 'wallet', 'name')
+WEAK_TYPES = ('name',)  # linked by edges only, never unioned
+PAIRWISE_LIMIT = 12  # records with more identifiers are linked as a star, not a clique
+MAX_CLUSTERS = 20  # clusters returned per lookup
+MAX_CLUSTER_ENTITIES = 200  # members listed per cluster (highest degree first); 'size' is the full count
+FORMAT = 2  # bump when the linking rules change, so saved graphs are rebuilt
+
+
+def normalize(etype, value):
+    v = str(value).strip()
+    if etype == 'phone':
+        return re.sub(r'[\s().-]', '', v)
+    if etype == 'name':
+        return " ".join(v.lower().split())
+    return v.lower()
+
+
+class UnionFind:
+    """Union by size + path halving; keeps each root's member set for O(1) cluster reads."""
+
+    def __init__(self):
+        self.parent = {}
+        self.members = {}
+
+    def add(self, x):
+        if x not in self.parent:
+            self.parent[x] = x
+            self.members[x] = {x}
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if len(self.members[ra]) < len(self.members[rb]):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.members[ra] |= self.members.pop(rb)
+        return ra
+
+    def component(self, x):
+        return self.members[self.find(x)]
+
+
+class EntityGraph:
+    def __init__(self, version=None):
+        self.version = version
+        self.format = FORMAT
+        self.graph = nx.Graph()
+        self.uf = UnionFind()
+        self.by_value = {}   # normalized value -> set of node keys (any type)
+        self.by_local = {}   # email local part -> set of email node keys
+        self.sources = {}    # record kind -> ids already folded in (records are (kind, id) tuples)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.graph.number_of_nodes()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # ----------------------------
+    # Building
+    # ----------------------------
+    def _node(self, etype, value):
+        key = (etype, normalize(etype, value))
+        if not key[1] or key[1] == 'nan':
+            return None
+        if key not in self.graph:
+            self.graph.add_node(key, type=etype, value=str(value).strip())
+            self.uf.add(key)
+            self.by_value.setdefault(key[1], set()).add(key)
+            if etype == 'email' and '@' in key[1]:
+                self.by_local.setdefault(key[1].split('@', 1)[0], set()).add(key)
+        return key
+
+    def has_record(self, source):
+        return source[1] in self.sources.get(source[0], ())
+
+    def records_of(self, kind):
+        return self.sources.get(kind, set())
+
+    def add_record(self, source, identifiers):
+        """
+        Fold in one record: `source` is a (kind, id) tuple, `identifiers` an
+        iterable of (type, value) seen together.
+        """
+        with self._lock:
+            if self.has_record(source):
+                return
+            self.sources.setdefault(source[0], set()).add(source[1])
+            nodes, weak = [], []
+            for etype, value in identifiers:
+                key = self._node(etype, value)
+                if key is not None and key not in nodes and key not in weak:
+                    (weak if etype in WEAK_TYPES else nodes).append(key)
+            if len(nodes) <= PAIRWISE_LIMIT:
+                pairs = [(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:]]
+            else:
+                pairs = [(nodes[0], b) for b in nodes[1:]]
+            for a, b in pairs:
+                self._edge(a, b, source)
+                self.uf.union(a, b)
+            # a weak identifier hangs off the record's first strong one (or the first weak one)
+            anchor = nodes[0] if nodes else (weak[0] if weak else None)
+            for w in weak:
+                if w != anchor:
+                    self._edge(anchor, w, source)
+
+    def _edge(self, a, b, source):
+        if self.graph.has_edge(a, b):
+            self.graph[a][b]['sources'].add(source)
+        else:
+            self.graph.add_edge(a, b, sources={source})
+
+    def add_extracted(self, source, entities):
+        """Fold in a sample given its extract() result."""
+        ids = [('email', v) for v in entities.get('emails', [])]
+        ids += [('phone', v) for v in entities.get('phones', [])]
+        ids += [('wallet', v) for v in entities.get('wallets', [])]
+        ids += [('name', v) for v in entities.get('names', [])]
+        self.add_record(source, ids)
+
+    def add_frame(self, df, name, columns=('email', 'username', 'phone')):
+        """Fold in every row of a dataset (or a chunk of it); records are keyed by the frame's row positions."""
+        cols = [c for c in columns if c in df.columns]
+        if not cols:
+            return
+        for pos, row in zip(df.index.tolist(), df[cols].itertuples(index=False, name=None)):
+            self.add_record((name, pos), [(c, v) for c, v in zip(cols, row) if v is not None and not pd.isna(v)])
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+    def _roots(self, key):
+        """Cluster roots a matched node resolves to (a weak node: those of its neighbours)."""
+        if key[0] not in WEAK_TYPES:
+            return [self.uf.find(key)]
+        return list({self.uf.find(n) for n in self.graph[key] if n[0] not in WEAK_TYPES}) or [key]
+
+    def lookup(self, query, max_clusters=MAX_CLUSTERS, max_entities=MAX_CLUSTER_ENTITIES):
+        """
+        Linked clusters for every node whose normalized value equals `query`
+        (and every email whose local part does), largest first. At most
+        max_clusters clusters of at most max_entities members are returned;
+        'size' and 'truncated' say how much was left out.
+        """
+        with self._lock:
+            keys = set()
+            for etype in NODE_TYPES:
+                keys |= self.by_value.get(normalize(etype, query), set())
+            keys |= self.by_local.get(normalize('email', query), set())
+            matched = {}
+            for key in sorted(keys):
+                for root in self._roots(key):
+                    matched.setdefault(root, []).append(key)
+            roots = sorted(matched, key=lambda r: (-len(self.uf.members.get(r, (r,))), r))
+            clusters = []
+            for root in roots[:max_clusters]:
+                members = self.uf.members.get(root, {root})
+                top = heapq.nsmallest(max_entities, members, key=lambda k: (-self.graph.degree(k), k))
+                clusters.append({
+                    'matched': [{'type': k[0], 'value': self.graph.nodes[k]['value']} for k in matched[root]],
+                    'size': len(members),
+                    'truncated': len(members) > len(top),
+                    'entities': [{'type': k[0], 'value': self.graph.nodes[k]['value'],
+                                  'degree': self.graph.degree(k)} for k in top],
+                })
+            return clusters
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"  # several worker processes may save at once
+        with self._lock, open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path, version):
+        """Saved graph for `version`, or None if missing/outdated."""
+        try:
+            with open(path, 'rb') as f:
+                g = pickle.load(f)
+        except Exception:
+            return None
+        return EntityGraph.matching(g, version)
+
+    @staticmethod
+    def matching(g, version):
+        """`g` if it is a graph of the current format for `version`, else None."""
+        if not isinstance(g, EntityGraph) or getattr(g, 'format', None) != FORMAT:
+            return None
+        return g if g.version == version else None
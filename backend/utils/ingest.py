@@ -0,0 +1,241 @@
+# Bulk ingest of large raw dumps into the segmented sample store (run from backend/):
+#
+#   python -m utils.ingest pastes.txt                   # records separated by blank lines
+#   python -m utils.ingest dump.txt --split line        # one record per line
+#   python -m utils.ingest dump.jsonl --workers 8       # one JSON object per line
+#
+# The dump is memory-mapped and cut into chunks (~8 MB) that end on a record
+# boundary. Worker processes map the same file, split their chunk into records
+# and run the EMAIL_RE / PHONE_RE / WALLET_RE scan + NER over it (extract_many);
+# the parent appends the results, in file order, to data/segments (see
+# collectors/segment_store.py) and commits a checkpoint after every chunk. At
+# most 2 x workers chunks are in flight, so memory stays bounded whatever the
+# dump size. Running the same command again resumes after the last committed
+# chunk, also when the dump has since been appended to; a running server picks
+# the new samples up on its next index refresh. The store is append-only, so a
+# dump that was rewritten (its head or the bytes before the checkpoint
+# changed, or it shrank) is refused rather than ingested again on top of its
+# old records; --restart / --force ingests it from the start anyway.
+import argparse, hashlib, json, mmap, os, sys, time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from collectors.segment_store import SEGMENTS_DIR, SegmentWriter
+
+CHUNK_BYTES = 8 * 1024 * 1024
+MAX_RECORD_BYTES = 1024 * 1024  # a record with no separator in this span is cut here
+SEPARATORS = {'blank': b"\n\n", 'line': b"\n"}
+FINGERPRINT_BYTES = 64 * 1024  # hashed at the start of the dump and just before the checkpoint
+
+_extract_many = None
+_version = None
+
+
+def _init_worker():
+    # spaCy is loaded once per worker process
+    global _extract_many, _version
+    from extractors.entities import extract_many, EXTRACTOR_VERSION
+    _extract_many = extract_many
+    _version = EXTRACTOR_VERSION
+
+
+def next_boundary(mm, pos, size, separator):
+    """First offset at or after `pos` where a record starts (end of file if none)."""
+    if pos >= size:
+        return size
+    limit = min(size, pos + MAX_RECORD_BYTES)
+    for sep in (separator, b"\n"):
+        i = mm.find(sep, pos, limit)
+        if i != -1:
+            return i + len(sep)
+    return limit
+
+
+def split_records(data, base, split):
+    """(byte offset, raw record) pairs; 'line' = one per non-empty line, 'blank' = blank-line separated blocks."""
+    pos = 0
+    start, block = None, []
+    for line in data.splitlines(keepends=True):
+        if line.strip():
+            if split == 'line':
+                yield base + pos, line.strip()
+            else:
+                if start is None:
+                    start = base + pos
+                block.append(line)
+        elif block:
+            yield start, b"".join(block).strip()
+            start, block = None, []
+        pos += len(line)
+    if block:
+        yield start, b"".join(block).strip()
+
+
+def to_sample(offset, raw, fmt, source, stem):
+    text = raw.decode('utf-8', 'replace')
+    sample = {'id': f"{stem}:{offset}", 'source': source, 'text': text}
+    if fmt == 'jsonl':
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            body = obj.get('text', obj.get('content'))
+            sample['text'] = body if isinstance(body, str) else text
+            for key in ('source', 'url', 'timestamp'):
+                if obj.get(key) is not None:
+                    sample[key] = obj[key]
+    return sample
+
+
+def process_chunk(path, start, end, fmt, split, source):
+    """Worker: map `path`, turn bytes [start, end) into samples with extracted entities."""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    stem = os.path.basename(path)
+    samples = [to_sample(off, raw, fmt, source, stem) for off, raw in split_records(data, start, split)]
+    for sample, entities in zip(samples, _extract_many([s['text'] for s in samples])):
+        sample['entities'] = entities
+        sample['extractor'] = _version
+    return samples
+
+
+def plan_chunks(path, start, size, split, chunk_bytes):
+    """(start, end) byte ranges covering [start, size), each ending on a record boundary."""
+    if size == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < size:
+            end = next_boundary(mm, min(size, pos + chunk_bytes), size, SEPARATORS[split])
+            yield pos, end
+            pos = end
+
+
+def fingerprint(path, offset):
+    """(head hash, tail hash): the first and the last FINGERPRINT_BYTES before `offset`."""
+    with open(path, 'rb') as f:
+        head = f.read(min(offset, FINGERPRINT_BYTES))
+        f.seek(max(0, offset - FINGERPRINT_BYTES))
+        tail = f.read(offset - f.tell())
+    return hashlib.sha256(head).hexdigest(), hashlib.sha256(tail).hexdigest()
+
+
+def resume_offset(path, cp, size):
+    """(offset, records) to resume from; RuntimeError if the dump changed other than by appending."""
+    offset, records = cp.get('offset', 0), cp.get('records', 0)
+    if size < offset:
+        changed = "shrank"
+    elif 'head_sha256' in cp:
+        changed = None if fingerprint(path, offset) == (cp['head_sha256'], cp['tail_sha256']) else "was modified"
+    else:
+        # checkpoint from before fingerprints: only an untouched file is known to be safe
+        changed = None if (cp.get('size'), cp.get('mtime_ns')) == (size, os.stat(path).st_mtime_ns) else "changed"
+    if changed:
+        raise RuntimeError(f"{path} {changed} since the last run; its {records} stored records would be "
+                           "duplicated. Use --restart (or --force) to ingest it from the start anyway")
+    return offset, records
+
+
+def fmt_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def ingest(path, fmt='auto', split='blank', workers=1, chunk_bytes=CHUNK_BYTES, restart=False,
+           store_dir=SEGMENTS_DIR, source=None):
+    path = os.path.abspath(path)
+    if fmt == 'auto':
+        fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'text'
+    if fmt == 'jsonl':
+        split = 'line'
+    source = source or f"ingest:{os.path.basename(path)}"
+    st = os.stat(path)
+    size = st.st_size
+
+    with SegmentWriter(store_dir) as writer:
+        cp = writer.manifest['sources'].get(path)
+        offset, records = 0, 0
+        if cp and not restart:
+            offset, records = resume_offset(path, cp, size)
+            if offset:
+                print(f"[*] Resuming at byte {offset} ({records} records already stored)", file=sys.stderr)
+        elif cp and restart:
+            print("[!] --restart: records already stored from this file will be appended again", file=sys.stderr)
+        if offset >= size:
+            print(f"[+] {path} already ingested ({records} records)", file=sys.stderr)
+            return records
+
+        def checkpoint(end):
+            head, tail = fingerprint(path, end)
+            return {'size': size, 'mtime_ns': st.st_mtime_ns, 'offset': end, 'records': records,
+                    'head_sha256': head, 'tail_sha256': tail, 'format': fmt, 'split': split,
+                    'updated': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+        started, first = time.monotonic(), offset
+
+        def progress(end):
+            elapsed = max(time.monotonic() - started, 1e-6)
+            rate = (end - first) / elapsed
+            eta = (size - end) / rate if rate else 0
+            print(f"\r[*] {end / 1e6:,.1f}/{size / 1e6:,.1f} MB ({100.0 * end / size:5.1f}%)  "
+                  f"{records:,} records  {rate / 1e6:.1f} MB/s  ETA {fmt_eta(eta)}",
+                  end="", file=sys.stderr, flush=True)
+
+        def store(end, samples):
+            nonlocal records
+            writer.append(samples)
+            records += len(samples)
+            writer.commit(path, checkpoint(end))
+            progress(end)
+
+        chunks = plan_chunks(path, offset, size, split, chunk_bytes)
+        if workers <= 1:
+            _init_worker()
+            for start, end in chunks:
+                store(end, process_chunk(path, start, end, fmt, split, source))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                # results are written in submission order so the checkpoint only moves forward
+                inflight = deque()
+                for start, end in chunks:
+                    inflight.append((end, pool.submit(process_chunk, path, start, end, fmt, split, source)))
+                    if len(inflight) >= 2 * workers:
+                        end, fut = inflight.popleft()
+                        store(end, fut.result())
+                while inflight:
+                    end, fut = inflight.popleft()
+                    store(end, fut.result())
+        print(file=sys.stderr)
+    print(f"[+] Ingested {path}: {records} records in {time.monotonic() - started:.1f}s", file=sys.stderr)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest large text/JSONL dumps into the segmented sample store")
+    parser.add_argument("inputs", nargs="+", help="dump files")
+    parser.add_argument("--format", choices=("auto", "text", "jsonl"), default="auto",
+                        help="jsonl: one JSON object per line, 'text'/'content' field used as the sample text")
+    parser.add_argument("--split", choices=("blank", "line"), default="blank",
+                        help="record separator for text dumps (default: blank lines)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                        help="extraction processes (1 = in-process)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1024 * 1024))
+    parser.add_argument("--source", default=None, help="value for the samples' 'source' field")
+    parser.add_argument("--store", default=SEGMENTS_DIR, help="segment store directory")
+    parser.add_argument("--restart", "--force", action="store_true",
+                        help="ignore the resume checkpoint; a changed dump's old records stay in the store")
+    args = parser.parse_args(argv)
+
+    for path in args.inputs:
+        try:
+            ingest(path, fmt=args.format, split=args.split, workers=args.workers,
+                   chunk_bytes=int(args.chunk_mb * 1024 * 1024), restart=args.restart,
+                   store_dir=args.store, source=args.source)
+        except RuntimeError as e:
+            print(f"[!] {e}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
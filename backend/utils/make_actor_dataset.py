@@ -1,4 +1,7 @@
-import pandas as pd, random, faker
+import argparse, os, random
+
+import faker
+import pandas as pd
 
 fake = faker.Faker()
 
@@ -27,34 +30,69 @@ risk_map = {"data trading": "High", "crypto scam": "High", "hacking forum": "Hig
             "malware dev": "Critical", "spam marketing": "Medium",
             "social activism": "Low", "tech contributor": "Low"}
 
-rows = []
-for _ in range(1000):
-    person = fake.simple_profile()
-    email = person['mail']
-    username = person['username']
-    phone = f"+{random.choice([91,1,44,61,81])}{random.randint(7000000000,9999999999)}"
-    breach = random.choice(breaches)
-    platform = random.choice(platforms)
-    year = random.randint(2010, 2024)
-    country = random.choice(countries)
-    activity, note = random.choice(activities)
-    risk = risk_map.get(activity, "Medium")
-    confidence = round(random.uniform(0.45, 0.98), 2)
-
-    rows.append({
+CHUNK = 100_000            # rows buffered before each CSV append
+IDENTITY_POOL = 1_000_000  # earlier actors kept around for --dup-ratio reuse
+
+
+def make_identity(rng):
+    username = f"{fake.user_name()}{rng.randint(0, 9999)}"
+    return username, f"{username}@{fake.free_email_domain()}"
+
+
+def make_row(rng, identity):
+    username, email = identity
+    phone = f"+{rng.choice([91,1,44,61,81])}{rng.randint(7000000000,9999999999)}"
+    activity, note = rng.choice(activities)
+    return {
         "email": email,
         "username": username,
         "phone": phone,
-        "country": country,
-        "breach_source": breach,
-        "platform": platform,
-        "year": year,
+        "country": rng.choice(countries),
+        "breach_source": rng.choice(breaches),
+        "platform": rng.choice(platforms),
+        "year": rng.randint(2010, 2024),
         "activity_type": activity,
-        "risk_level": risk,
-        "confidence": confidence,
+        "risk_level": risk_map.get(activity, "Medium"),
+        "confidence": round(rng.uniform(0.45, 0.98), 2),
         "note": note
-    })
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic actor intelligence CSV")
+    parser.add_argument("-n", "--rows", type=int, default=1000, help="number of rows (default 1000)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--dup-ratio", type=float, default=0.0,
+                        help="fraction of rows that reuse an earlier actor's email/username")
+    parser.add_argument("--out", default="data/dummy_actor_intelligence.csv", help="output CSV path")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    if args.seed is not None:
+        faker.Faker.seed(args.seed)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+
+    identities = []
+    written = 0
+    while written < args.rows:
+        rows = []
+        for _ in range(min(CHUNK, args.rows - written)):
+            if identities and rng.random() < args.dup_ratio:
+                identity = rng.choice(identities)
+            else:
+                identity = make_identity(rng)
+                if len(identities) < IDENTITY_POOL:
+                    identities.append(identity)
+                else:
+                    identities[rng.randrange(IDENTITY_POOL)] = identity
+            rows.append(make_row(rng, identity))
+        pd.DataFrame(rows).to_csv(args.out, index=False, mode="w" if written == 0 else "a", header=written == 0)
+        written += len(rows)
+        if args.rows > CHUNK:
+            print(f"  {written}/{args.rows}")
+
+    print(f"[+] Generated {written} synthetic actor intelligence records.")
+
 
-df = pd.DataFrame(rows)
-df.to_csv("data/dummy_actor_intelligence.csv", index=False)
-print("[+] Generated 1000 synthetic actor intelligence records.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse, csv, os, random
+
+# Synthetic stand-ins for the two breach datasets the app loads from data/:
+# the Kaggle organisation-level breaches CSV (';'-separated) and the person
+# breaches CSV. Used by utils/benchmark.py so every dataset is present.
+KAGGLE_NAME = "Data_Breaches_EN_V2_2004_2017_20180220.csv"
+PERSON_NAME = "person_breaches.csv"
+
+ORG_WORDS = ["First", "National", "Global", "United", "Pacific", "Metro", "Royal", "Summit", "Union", "Capital"]
+ORG_KINDS = ["Bank", "Health", "Telecom", "Retail", "Insurance", "Airlines", "Games", "University", "Hotels", "Energy"]
+ORG_TYPES = ["financial", "healthcare", "telecoms", "retail", "academic", "gaming", "transport", "energy"]
+METHODS = ["hacked", "poor security", "inside job", "lost device", "accidentally published"]
+BREACH_SOURCES = ["LinkedIn", "Adobe", "Zomato", "Canva", "Dropbox", "Facebook", "Twitter", "Reddit", "GitHub"]
+EXPOSED = ["email, password", "email, phone", "email, password, phone", "email, address", "email, username, dob"]
+HANDLES = ["darklion", "shadowfox", "n3tw0rm", "cryptoking", "ghostbyte", "redviper", "zeroday", "lowkey"]
+DOMAINS = ["protonmail.com", "gmail.com", "yahoo.com", "tutanota.com", "example.com"]
+
+CHUNK = 100_000  # rows buffered before each write
+
+
+def breach_row(rng):
+    entity = f"{rng.choice(ORG_WORDS)} {rng.choice(ORG_KINDS)} {rng.randint(1, 999)}"
+    year = rng.randint(2004, 2017)
+    lost = rng.choice([rng.randint(1_000, 500_000), rng.randint(500_000, 200_000_000), "Unknown"])
+    method = rng.choice(METHODS)
+    return {
+        "Entity": entity,
+        "Alternative Name": entity.split()[0] + entity.split()[1][:3],
+        "Story": f"{entity} disclosed a breach in {year} ({method}) that exposed customer records.",
+        "Year": year,
+        "Records Lost": lost,
+        "ORGANISATION TYPE": rng.choice(ORG_TYPES),
+        "METHOD OF LEAK": method,
+    }
+
+
+def person_row(rng):
+    handle = f"{rng.choice(HANDLES)}{rng.randint(1, 99999)}"
+    return {
+        "email": f"{handle}@{rng.choice(DOMAINS)}",
+        "username": handle,
+        "breach_source": rng.choice(BREACH_SOURCES),
+        "year": rng.randint(2012, 2024),
+        "data_exposed": rng.choice(EXPOSED),
+    }
+
+
+# the benchmark's default queries hit these
+DEMO_PERSON = {"email": "darklion99@protonmail.com", "username": "darklion99", "breach_source": "LinkedIn",
+               "year": 2021, "data_exposed": "email, password"}
+
+
+def write_csv(path, rows, make_row, rng, first=(), sep=","):
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = None
+        pending = list(first)
+        while written < rows:
+            batch = pending[:rows - written]
+            pending = []
+            batch += [make_row(rng) for _ in range(min(CHUNK, rows - written) - len(batch))]
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(batch[0]), delimiter=sep)
+                writer.writeheader()
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic breaches and person breach CSVs")
+    parser.add_argument("--breaches", type=int, default=300, help="organisation breach rows (default 300)")
+    parser.add_argument("--persons", type=int, default=1000, help="person breach rows (default 1000)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--out-dir", default="data", help="directory the CSVs are written to")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.breaches:
+        n = write_csv(os.path.join(args.out_dir, KAGGLE_NAME), args.breaches, breach_row, rng, sep=";")
+        print(f"[+] Generated {n} synthetic organisation breach records.")
+    if args.persons:
+        n = write_csv(os.path.join(args.out_dir, PERSON_NAME), args.persons, person_row, rng, first=[DEMO_PERSON])
+        print(f"[+] Generated {n} synthetic person breach records.")
+
+
+if __name__ == "__main__":
+    main()
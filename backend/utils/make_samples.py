@@ -1,5 +1,4 @@
-import json, os
-os.makedirs("data/samples", exist_ok=True)
+import argparse, json, os, random
 
 
 templates = [
@@ -9,14 +8,57 @@ templates = [
 {"source":"leak","text":"Email: victim@example.com leaked in breach 'loanapp-2023' with mention of darklion99"}
 ]
 
+# building blocks for synthetic (non-template) samples
+SOURCES = ["pastebin", "github", "forum", "leak"]
+HANDLES = ["darklion", "shadowfox", "n3tw0rm", "cryptoking", "ghostbyte", "redviper", "zeroday", "lowkey"]
+DOMAINS = ["protonmail.com", "gmail.com", "yahoo.com", "tutanota.com", "example.com"]
+PHRASES = [
+    "Selling DB. Contact {email}, wallet {wallet}, phone {phone}",
+    "Repo by {handle} includes creds-list.txt and notes: contact {email}",
+    "User {handle} posted invoices with phone {phone} and email {email}",
+    "Email: {email} leaked in breach '{handle}-dump' with mention of {handle}",
+    "Fresh combo list from {handle}, payments to {wallet} only",
+]
+
+
+def synthetic_sample(rng):
+    handle = f"{rng.choice(HANDLES)}{rng.randint(1, 99999)}"
+    text = rng.choice(PHRASES).format(
+        handle=handle,
+        email=f"{handle}@{rng.choice(DOMAINS)}",
+        wallet="bc1q" + "".join(rng.choice("023456789acdefghjklmnpqrstuvwxyz") for _ in range(12)),
+        phone=f"+91{rng.randint(6000000000, 9999999999)}",
+    )
+    return {"source": rng.choice(SOURCES), "text": text}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate local JSON samples in data/samples")
+    parser.add_argument("-n", "--count", type=int, default=30, help="number of samples (default 30)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for synthetic samples")
+    parser.add_argument("--dup-ratio", type=float, default=None,
+                        help="fraction of samples copied from the 4 demo templates (default: all of them); "
+                             "the rest are unique synthetic pastes")
+    parser.add_argument("--out", default="data/samples", help="output directory")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    rng = random.Random(args.seed)
+    for i in range(args.count):
+        if args.dup_ratio is None or rng.random() < args.dup_ratio:
+            t = templates[i % len(templates)].copy()
+        else:
+            t = synthetic_sample(rng)
+        t["id"] = f"sample{i+1}"
+        t["timestamp"] = "2025-11-09T00:00:00Z"
+        p = os.path.join(args.out, f"{t['id']}.json")
+        with open(p, "w", encoding='utf-8') as f:
+            json.dump(t, f, indent=2)
+        if args.count >= 100000 and (i + 1) % 100000 == 0:
+            print(f"  {i+1}/{args.count}")
 
-for i in range(30):
-    t = templates[i % len(templates)].copy()
-    t["id"] = f"sample{i+1}"
-    t["timestamp"] = "2025-11-09T00:00:00Z"
-    p = os.path.join("data/samples", f"{t['id']}.json")
-    with open(p, "w", encoding='utf-8') as f:
-        json.dump(t, f, indent=2)
+    print("Generated", args.count, "samples in", args.out)
 
 
-print("Generated", len(os.listdir("data/samples")), "samples in data/samples")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# Built-in instrumentation: per-stage timers, hit / rows-scanned counters,
+# dataset load gauges, Prometheus text exposition and a slow-query log.
+#
+# Off by default; PROFILER_METRICS=1 turns it on. While off, timer() hands back
+# a shared no-op context manager and inc()/observe() return immediately, so
+# the instrumented code paths pay next to nothing. Load-time gauges are always
+# kept (they are written once at start-up).
+#
+#   PROFILER_METRICS=1              enable timers and counters
+#   PROFILER_SLOW_QUERY_MS=500      log requests slower than this (0 = off)
+#   PROFILER_SLOW_QUERY_LOG=path    also append slow-query records (JSON lines) here
+import json, os, threading, time
+
+ENABLED = os.environ.get("PROFILER_METRICS", "0") == "1"
+SLOW_QUERY_MS = float(os.environ.get("PROFILER_SLOW_QUERY_MS", "1000"))
+SLOW_QUERY_LOG = os.environ.get("PROFILER_SLOW_QUERY_LOG")
+
+# histogram buckets for stage durations, seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'profiler_stage_seconds': ('histogram', 'Time spent per pipeline stage.'),
+    'profiler_requests_total': ('counter', 'Instrumented requests by endpoint.'),
+    'profiler_hits_total': ('counter', 'Matches returned per profile section.'),
+    'profiler_rows_scanned_total': ('counter', 'Rows examined by dataset lookups (after index pruning).'),
+    'profiler_slow_queries_total': ('counter', 'Requests over the slow-query threshold.'),
+    'profiler_result_cache_total': ('counter', 'Profile result cache lookups by outcome.'),
+    'profiler_reports_written_total': ('counter', 'PDF reports written to disk.'),
+    'profiler_dataset_load_seconds': ('gauge', 'Dataset load time.'),
+    'profiler_dataset_rows': ('gauge', 'Rows loaded per dataset.'),
+    'profiler_warmup_seconds': ('gauge', 'Load time per lazily loaded resource.'),
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_local = threading.local()
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+
+def observe(name, seconds, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                h[i] += 1
+        h[-2] += seconds
+        h[-1] += 1
+
+
+# ----------------------------
+# Timers and request traces
+# ----------------------------
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('stage', 'trace', 'start')
+
+    def __init__(self, stage, trace):
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        observe('profiler_stage_seconds', elapsed, stage=self.stage)
+        if self.trace is not None:
+            self.trace.add(self.stage, elapsed)
+        return False
+
+
+def timer(stage):
+    """Context manager timing one stage (and adding it to the current request trace)."""
+    if not ENABLED:
+        return _NULL
+    return _Timer(stage, getattr(_local, 'trace', None))
+
+
+class Trace:
+    """Stage breakdown of one request, for the slow-query log."""
+
+    def __init__(self, endpoint, **info):
+        self.endpoint = endpoint
+        self.info = info
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class _Request:
+    def __init__(self, endpoint, info):
+        self.trace = Trace(endpoint, **info)
+
+    def __enter__(self):
+        self.prev = getattr(_local, 'trace', None)
+        _local.trace = self.trace
+        self.start = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.start
+        _local.trace = self.prev
+        endpoint = self.trace.endpoint
+        inc('profiler_requests_total', endpoint=endpoint)
+        observe('profiler_stage_seconds', total, stage=f"{endpoint}:total")
+        if SLOW_QUERY_MS and total * 1000 >= SLOW_QUERY_MS:
+            _log_slow(self.trace, total)
+        return False
+
+
+def request(endpoint, **info):
+    """Context manager wrapping a whole request; stage timers inside it feed its trace."""
+    if not ENABLED:
+        return _NULL
+    return _Request(endpoint, info)
+
+
+def bind(fn):
+    """Wrap `fn` so it records into the caller's request trace when run on another thread."""
+    if not ENABLED:
+        return fn
+    trace = getattr(_local, 'trace', None)
+
+    def run(*args, **kwargs):
+        prev = getattr(_local, 'trace', None)
+        _local.trace = trace
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.trace = prev
+    return run
+
+
+def _log_slow(trace, total):
+    inc('profiler_slow_queries_total', endpoint=trace.endpoint)
+    record = dict(trace.info, endpoint=trace.endpoint, total_ms=round(total * 1000, 2),
+                  stages_ms={k: round(v * 1000, 2) for k, v in sorted(trace.stages.items())},
+                  ts=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    line = json.dumps(record, default=str)
+    print("[slow]", line)
+    if SLOW_QUERY_LOG:
+        try:
+            with open(SLOW_QUERY_LOG, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print("[!] Could not write slow-query log:", e)
+
+
+# ----------------------------
+# Prometheus exposition
+# ----------------------------
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+    by_name = {}
+    for store in (counters, gauges, histograms):
+        for (name, labels) in store:
+            by_name.setdefault(name, []).append(labels)
+
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ('untyped', name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels in sorted(by_name[name]):
+            key = (name, labels)
+            if key in histograms:
+                h = histograms[key]
+                for bound, count in zip(BUCKETS, h):
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {h[-1]}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {h[-2]}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {h[-1]}")
+            else:
+                value = counters[key] if key in counters else gauges[key]
+                lines.append(f"{name}{_fmt_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
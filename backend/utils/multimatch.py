@@ -0,0 +1,71 @@
+# Aho-Corasick multi-pattern matcher: finds which of many query strings occur
+# in a text in one left-to-right pass, independent of the number of patterns.
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, patterns=()):
+        self.patterns = []
+        self._goto = [{}]     # state -> {char: next state}
+        self._fail = [0]
+        self._out = [()]      # state -> pattern ids ending here (incl. via fail links)
+        self._built = False
+        for p in patterns:
+            self.add(p)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add(self, pattern):
+        """Add a pattern; returns its id (position in `patterns`)."""
+        if not pattern:
+            raise ValueError("empty pattern")
+        pid = len(self.patterns)
+        self.patterns.append(pattern)
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + (pid,)
+        self._built = False
+        return pid
+
+    def build(self):
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def find(self, text):
+        """Set of pattern ids occurring anywhere in `text`."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,145 @@
+# Response shaping for /api/profile: compact mode, field selection,
+# pagination and content negotiation (gzip, optional msgpack).
+#
+#   ?compact=1          occurrences reference hits instead of repeating their text
+#                       ('hit' is a position in the local_hits of the same response,
+#                       absent when that hit is not on the page or not selected),
+#                       long breach text is truncated, descriptive_report is left out
+#   ?fields=a,b         only these sections (plus 'query'); may re-add descriptive_report
+#   ?limit=N&offset=M   page every list section; 'page' reports totals / next offsets
+#   Accept: application/msgpack      msgpack body (if the msgpack package is installed)
+#   Accept-Encoding: gzip            gzip-compressed body
+import gzip
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON is always available
+    msgpack = None
+
+LIST_SECTIONS = ('local_hits', 'clusters', 'breach_data', 'person_breach', 'actor_intel', 'fuzzy_matches')
+COMPACT_TEXT_LIMIT = 200  # characters kept of long breach text fields in compact mode
+COMPACT_TEXT_FIELDS = ('Story',)
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+class Options:
+    def __init__(self, compact=False, fields=None, limit=None, offset=0):
+        self.compact = compact
+        self.fields = fields
+        self.limit = limit
+        self.offset = offset
+
+    @classmethod
+    def from_args(cls, args):
+        """Parse the query string; raises ValueError on bad limit/offset."""
+        fields = args.get('fields')
+        fields = tuple(f.strip() for f in fields.split(',') if f.strip()) if fields else None
+        limit = args.get('limit')
+        limit = int(limit) if limit not in (None, '') else None
+        offset = int(args.get('offset') or 0)
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit and offset must be non-negative")
+        return cls(compact=args.get('compact', '').lower() in ('1', 'true'),
+                   fields=fields, limit=limit, offset=offset)
+
+    @property
+    def default(self):
+        return not self.compact and self.fields is None and self.limit is None and not self.offset
+
+    def key(self):
+        """Stable string for cache keys."""
+        return f"c={int(self.compact)};f={','.join(self.fields or ())};l={self.limit};o={self.offset}"
+
+
+def compact_clusters(clusters, hits):
+    """Clusters whose occurrences point at positions in `hits` instead of carrying the text.
+
+    `hits` must be the local_hits list actually sent with these clusters.
+    """
+    position = {}
+    for i, h in enumerate(hits):
+        position.setdefault((h.get('source', 'local'), h.get('id'), h.get('text', '')), i)
+    out = []
+    for c in clusters:
+        occs = []
+        for occ in c.get('occurrences', []):
+            ref = {k: occ.get(k) for k in ('source', 'id', 'timestamp')}
+            hit = position.get((occ.get('source'), occ.get('id'), occ.get('text')))
+            if hit is not None:
+                ref['hit'] = hit
+            occs.append(ref)
+        out.append(dict(c, occurrences=occs))
+    return out
+
+
+def truncate_text(rows):
+    out = []
+    for r in rows:
+        r = dict(r)
+        for k in COMPACT_TEXT_FIELDS:
+            v = r.get(k)
+            if isinstance(v, str) and len(v) > COMPACT_TEXT_LIMIT:
+                r[k] = v[:COMPACT_TEXT_LIMIT] + "..."
+        out.append(r)
+    return out
+
+
+def shape(profile, opts):
+    """Apply compact mode, field selection and pagination to a built profile."""
+    if opts.default:
+        return profile
+    out = dict(profile)
+    if opts.compact:
+        if 'breach_data' in out:
+            out['breach_data'] = truncate_text(out['breach_data'])
+        if not (opts.fields and 'descriptive_report' in opts.fields):
+            out.pop('descriptive_report', None)
+    if opts.fields is not None:
+        out = {k: v for k, v in out.items() if k == 'query' or k in opts.fields}
+    if opts.limit is not None or opts.offset:
+        page = {}
+        for section in LIST_SECTIONS:
+            items = out.get(section)
+            if not isinstance(items, list):
+                continue
+            end = len(items) if opts.limit is None else opts.offset + opts.limit
+            out[section] = items[opts.offset:end]
+            page[section] = {'total': len(items), 'offset': opts.offset, 'limit': opts.limit,
+                             'next_offset': end if end < len(items) else None}
+        out['page'] = page
+    # after selection and paging, so 'hit' indexes the local_hits this response carries
+    if opts.compact and 'clusters' in out:
+        out['clusters'] = compact_clusters(out['clusters'], out.get('local_hits', []))
+    return out
+
+
+def negotiate_format(accept):
+    """'msgpack' when the client asks for it and msgpack is installed, else 'json'."""
+    accept = (accept or '').lower()
+    if msgpack is not None and any(t in accept for t in MSGPACK_TYPES):
+        return 'msgpack'
+    return 'json'
+
+
+def encode(data, fmt, json_dumps):
+    """(body bytes, mimetype)."""
+    if fmt == 'msgpack':
+        return msgpack.packb(data, use_bin_type=True, default=str), MSGPACK_TYPES[0]
+    return json_dumps(data).encode('utf-8'), 'application/json'
+
+
+def accepts_gzip(accept_encoding):
+    for part in (accept_encoding or '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0')
+    return False
+
+
+def compress(body, accept_encoding):
+    """(body, content-encoding or None): gzip when accepted and worth it."""
+    if len(body) >= GZIP_MIN_BYTES and accepts_gzip(accept_encoding):
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), 'gzip'
+    return body, None
@@ -0,0 +1,168 @@
+# PDF report generation off the request thread.
+#
+# submit() returns a job immediately; a small worker pool renders the PDF in
+# memory, hashes the bytes as they are produced and writes them once to a path
+# derived from the hash (via a temp file + rename, so concurrent jobs never
+# clobber each other). Jobs are deduplicated on a hash of the report input, so
+# re-submitting an identical profile returns the existing job/report.
+import hashlib, json, os, re, threading, time, uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+
+MAX_JOBS = 1000  # finished jobs remembered for polling / dedup
+# the core PDF fonts only cover latin-1; common typography is spelled out, the rest becomes '?'
+PDF_REPLACEMENTS = str.maketrans({'\u2014': '-', '\u2013': '-', '\u2018': "'", '\u2019': "'",
+                                  '\u201c': '"', '\u201d': '"', '\u2022': '*', '\u2026': '...'})
+
+
+def pdf_text(value):
+    """`value` as text the latin-1 PDF fonts can render."""
+    return str(value).translate(PDF_REPLACEMENTS).encode('latin-1', 'replace').decode('latin-1')
+
+
+def render_report_pdf(data):
+    """Build the report PDF for a profile dict and return its bytes."""
+    from fpdf import FPDF  # imported on first report, not at server start-up
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, pdf_text(f"Profiler.AI Report - {data.get('query', '')}"), ln=True)
+    pdf.set_font('Arial', '', 10)
+    pdf.multi_cell(0, 6, pdf_text(data.get('summary', data.get('descriptive_report', '')[:1000])))
+
+    # clusters
+    for c in data.get('clusters', []):
+        pdf.ln(2)
+        pdf.set_font('Arial','B',10)
+        pdf.cell(0,6, pdf_text(f"{c.get('type')} : {c.get('value')} (score {c.get('score')})"), ln=True)
+        pdf.set_font('Arial','',9)
+        for occ in c.get('occurrences', [])[:5]:
+            pdf.multi_cell(0,5, pdf_text(f"- {occ.get('source')} / {occ.get('id')}"))
+
+    # breach data
+    if data.get('breach_data'):
+        pdf.ln(3)
+        pdf.set_font('Arial','B',12)
+        pdf.cell(0,6, "Breach Records", ln=True)
+        pdf.set_font('Arial','',9)
+        for b in data.get('breach_data')[:10]:
+            pdf.multi_cell(0,5, pdf_text(str(b)))
+
+    # actor intel
+    if data.get('actor_intel'):
+        pdf.ln(3)
+        pdf.set_font('Arial','B',12)
+        pdf.cell(0,6, "Actor Intelligence", ln=True)
+        pdf.set_font('Arial','',9)
+        for a in data.get('actor_intel')[:10]:
+            pdf.multi_cell(0,5, pdf_text(f"{a.get('username','')} | {a.get('platform','')} | {a.get('activity_type','')} | risk:{a.get('risk_level')} | conf:{a.get('confidence')}"))
+
+    # fpdf 1.x returns the document as a latin-1 str
+    out = pdf.output(dest='S')
+    return out.encode('latin-1') if isinstance(out, str) else bytes(out)
+
+
+def input_key(data):
+    """Dedup key: hash of the canonical JSON of the report input."""
+    canon = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canon.encode('utf-8')).hexdigest()
+
+
+def safe_name(query):
+    return re.sub(r'[^A-Za-z0-9_.@-]+', '_', str(query or 'profile'))[:60] or 'profile'
+
+
+class ReportJob:
+    def __init__(self, key, query):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.query = query
+        self.status = 'queued'
+        self.report_path = None
+        self.sha256 = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        d = {'job_id': self.id, 'status': self.status, 'query': self.query}
+        if self.status == 'done':
+            d.update(report_path=self.report_path, sha256=self.sha256)
+        if self.error:
+            d['error'] = self.error
+        return d
+
+
+class ReportQueue:
+    def __init__(self, out_dir, workers=2):
+        self.out_dir = out_dir
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()  # job id -> ReportJob
+        self._by_key = {}           # input key -> job id
+
+    def submit(self, data):
+        """Queue a report for `data` (or return the job that already covers it)."""
+        key = input_key(data)
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and existing.status != 'failed' and (
+                    existing.status != 'done' or os.path.exists(existing.report_path)):
+                return existing
+            job = ReportJob(key, data.get('query', ''))
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+            self._trim()
+        self._pool.submit(metrics.bind(self._run), job, data)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, timeout=None):
+        job.done.wait(timeout)
+        return job
+
+    def _trim(self):
+        while len(self._jobs) > MAX_JOBS:
+            old_id, old = next(iter(self._jobs.items()))
+            if not old.done.is_set():
+                break
+            del self._jobs[old_id]
+            if self._by_key.get(old.key) == old_id:
+                del self._by_key[old.key]
+
+    def _run(self, job, data):
+        job.status = 'running'
+        try:
+            with metrics.timer('report_render'):
+                body = render_report_pdf(data)
+            digest = hashlib.sha256(body).hexdigest()
+            path = os.path.join(self.out_dir, f"report_{safe_name(job.query)}_{digest[:16]}.pdf")
+            if not os.path.exists(path):
+                metrics.inc('profiler_reports_written_total')
+                os.makedirs(self.out_dir, exist_ok=True)
+                tmp = f"{path}.{job.id}.tmp"
+                with open(tmp, 'wb') as f:
+                    f.write(body)
+                os.replace(tmp, path)
+            job.report_path = path
+            job.sha256 = digest
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            job.done.set()
+
+    def info(self):
+        with self._lock:
+            counts = {}
+            for j in self._jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+            return counts
@@ -0,0 +1,86 @@
+# Cache of serialized /api/profile responses.
+#
+# Entries are keyed by the normalized query (plus a variant string for request
+# options that change the body, e.g. fuzzy mode) and tagged with the dataset version
+# they were computed from (sample store + loaded CSVs). A lookup under a newer
+# version drops everything computed from older data, so a changed sample or a
+# reloaded dataset can never serve a stale profile. Entries also expire after a
+# TTL, and the total size of the cached bodies is bounded (LRU eviction).
+import threading, time
+from collections import OrderedDict
+
+
+class ProfileCache:
+    def __init__(self, ttl=300.0, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, body)
+        self._bytes = 0
+        self._version = None
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    @staticmethod
+    def normalize(query):
+        # only surrounding whitespace: case and inner spacing both change the
+        # profile (the query is echoed back verbatim and matched as a substring)
+        return query.strip()
+
+    def _drop(self, key):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.stats['invalidations'] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def get(self, query, version, variant=''):
+        key = (self.normalize(query), variant)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, query, version, body, variant=''):
+        """Store a serialized profile body (bytes) computed under `version`."""
+        key = (self.normalize(query), variant)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats,
+                        entries=len(self._entries),
+                        bytes=self._bytes,
+                        max_bytes=self.max_bytes,
+                        ttl=self.ttl,
+                        hit_ratio=round(self.stats['hits'] / lookups, 4) if lookups else 0.0)
@@ -0,0 +1,180 @@
+# Materialized per-entity rollups for aggregate / timeline views.
+#
+# For every email, username (person + actor datasets) and organization
+# (breaches dataset) the store keeps row counts per dataset, counts by year,
+# platform, activity_type, risk_level and breach_source, and the summed
+# Records Lost. Everything is computed once with column-wise groupbys, so
+# serving an entity is a dict lookup. Each dataset's CSV is checkpointed
+# (size, row count, SHA-256); when a CSV has only been appended to, just the
+# new rows are folded in, otherwise the rollups are rebuilt.
+import hashlib, os, pickle, threading
+
+import pandas as pd
+
+KINDS = ('email', 'username', 'organization')
+DIMENSIONS = {
+    'year': ('year', 'Year', 'Year '),
+    'platform': ('platform',),
+    'activity_type': ('activity_type',),
+    'risk_level': ('risk_level',),
+    'breach_source': ('breach_source',),
+}
+RECORDS_LOST_COLUMNS = ('Records Lost', 'records_lost')
+
+
+def dim_label(v):
+    """JSON-friendly bucket name: 2019.0 -> '2019', otherwise the stripped string."""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v).strip()
+
+
+def records_lost(series):
+    """Numeric Records Lost ('1,000' -> 1000); unparseable or missing -> 0."""
+    cleaned = series.astype(str).str.replace(',', '', regex=False).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0)
+
+
+def file_prefix_sha256(path, size, chunk=1 << 20):
+    h = hashlib.sha256()
+    remaining = size
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(chunk, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+class Rollups:
+    def __init__(self):
+        self.entities = {}  # (kind, normalized value) -> rollup dict
+        self.sources = {}   # dataset -> CSV checkpoint
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _entry(self, kind, key):
+        e = self.entities.get((kind, key))
+        if e is None:
+            e = self.entities[(kind, key)] = {'rows': {}, 'records_lost': 0, **{f"by_{d}": {} for d in DIMENSIONS}}
+        return e
+
+    # ----------------------------
+    # Building
+    # ----------------------------
+    def add_frame(self, df, dataset, keys):
+        """Fold the rows of `df` in; `keys` maps rollup kind -> key column."""
+        if not len(df):
+            return
+        dims = {}
+        for dim, cands in DIMENSIONS.items():
+            col = next((c for c in cands if c in df.columns), None)
+            if col is not None:
+                dims[dim] = col
+        lost_col = next((c for c in RECORDS_LOST_COLUMNS if c in df.columns), None)
+        lost = records_lost(df[lost_col]) if lost_col else None
+
+        with self._lock:
+            for kind, col in keys.items():
+                if col is None or col not in df.columns:
+                    continue
+                valid = df[col].notna().to_numpy()
+                k = df[col][valid].astype(str).str.strip().str.lower()
+                keep = (k != '').to_numpy()
+                k = k[keep]
+                rows = df[valid][keep]
+                for key, n in k.value_counts(sort=False).items():
+                    e = self._entry(kind, key)
+                    e['rows'][dataset] = e['rows'].get(dataset, 0) + int(n)
+                for dim, dcol in dims.items():
+                    vals = rows[dcol]
+                    present = vals.notna().to_numpy()
+                    # label each distinct value once, then count (key, value) pairs
+                    codes, uniques = pd.factorize(vals[present].astype(object))
+                    labels = [dim_label(u) for u in uniques]
+                    pairs = pd.DataFrame({'k': k[present].to_numpy(), 'c': codes}).groupby(['k', 'c'], sort=False).size()
+                    field = f"by_{dim}"
+                    for (key, code), n in pairs.items():
+                        bucket = self._entry(kind, key)[field]
+                        label = labels[code]
+                        bucket[label] = bucket.get(label, 0) + int(n)
+                if lost is not None:
+                    sums = lost[valid][keep].groupby(k.to_numpy()).sum()
+                    for key, total in sums.items():
+                        self._entry(kind, key)['records_lost'] += int(total)
+
+    def sync(self, dataset, rows, chunks, path, keys):
+        """
+        Bring `dataset` (`rows` rows, parsed from the CSV at `path`) up to
+        date; `chunks(start)` yields its rows from position `start` on as
+        DataFrames. Returns 'unchanged', 'appended' (only the new rows were
+        folded in) or 'stale' (the CSV was rewritten; the caller must
+        rebuild, counts cannot be subtracted).
+        """
+        st = os.stat(path)
+        cp = self.sources.get(dataset)
+        if cp is None:
+            if any(e['rows'].get(dataset) for e in self.entities.values()):
+                return 'stale'
+            start = 0
+        elif cp['path'] != path or st.st_size < cp['size'] or rows < cp['rows']:
+            return 'stale'
+        elif st.st_size == cp['size'] and st.st_mtime_ns == cp['mtime_ns'] and rows == cp['rows']:
+            return 'unchanged'
+        elif not cp.get('ends_with_newline') or file_prefix_sha256(path, cp['size']) != cp['sha256']:
+            return 'stale'
+        else:
+            start = cp['rows']
+        for df in chunks(start):
+            self.add_frame(df, dataset, keys)
+        with open(path, 'rb') as f:
+            f.seek(max(0, st.st_size - 1))
+            last = f.read(1)
+        self.sources[dataset] = {
+            'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'rows': rows,
+            'sha256': file_prefix_sha256(path, st.st_size), 'ends_with_newline': last == b"\n",
+        }
+        return 'appended'
+
+    # ----------------------------
+    # Queries
+    # ----------------------------
+    def get(self, kind, value):
+        """Rollup of one entity (years in order), or None."""
+        e = self.entities.get((kind, str(value).strip().lower()))
+        if e is None:
+            return None
+        out = dict(e, rows=dict(e['rows']), total_rows=sum(e['rows'].values()))
+        out['by_year'] = dict(sorted(e['by_year'].items()))
+        return out
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with self._lock, open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def load(path):
+        try:
+            with open(path, 'rb') as f:
+                r = pickle.load(f)
+        except Exception:
+            return None
+        return r if isinstance(r, Rollups) else None
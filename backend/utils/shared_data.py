@@ -0,0 +1,341 @@
+# Datasets shared read-only between server worker processes.
+#
+# With PROFILER_SHARED_DATA=1 the datasets are not parsed into every worker.
+# One process (the first worker to start, or `python -m utils.shared_data
+# publish`) writes each dataset, plus the lowercased values of its search
+# columns, as an uncompressed Arrow IPC file into a new generation directory
+# under SHARED_DIR (tmpfs /dev/shm by default) and then atomically replaces the
+# CURRENT pointer. Workers memory-map the files of the current generation: the
+# pages exist once in tmpfs / the page cache and are mapped into every worker,
+# so a worker's own dataset memory is limited to the rows a request
+# materializes. The n-gram postings of every search column are written with
+# the generation too (sorted .npy arrays, memory-mapped like the tables), so a
+# substring lookup reads a few posting lists instead of scanning the column.
+# Structures derived from the rows (the fuzzy handle index,
+# rollups, the dataset part of the entity graph) are built once by the
+# publisher and pickled into the generation, so workers load them instead of
+# each rebuilding them. Workers re-read CURRENT periodically on a background
+# thread and swap to a new generation as a whole; old generations are deleted
+# once two newer exist.
+#
+#   python -m utils.shared_data publish     publish the CSVs if the generation is outdated
+#   python -m utils.shared_data publish --force   always write a new generation
+#   python -m utils.shared_data status      show the current generation
+import hashlib, json, os, pickle, shutil, time
+from array import array
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.compute as pc
+except ImportError:
+    pc = None
+
+try:
+    import fcntl
+except ImportError:  # no cross-process lock on this platform
+    fcntl = None
+
+from utils import metrics
+from utils.dataset_index import NGRAM, FrameIndex, lowered, ngrams
+from utils.snapshot import pa, table_to_frame
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data")
+SHARED_DIR = os.environ.get("PROFILER_SHARED_DIR") or (
+    os.path.join("/dev/shm", "profiler-" + hashlib.sha1(os.path.abspath(DATA_DIR).encode('utf-8')).hexdigest()[:10])
+    if os.path.isdir("/dev/shm") else os.path.join(DATA_DIR, "shared"))
+POINTER = "CURRENT"
+LC_PREFIX = "__lc__"  # lowercased copy of a search column
+KEEP_GENERATIONS = 2  # current + previous (a worker may be between reading CURRENT and mapping)
+POSTING_PARTS = ('grams', 'offsets', 'rows')
+
+
+def gram_key(gram):
+    """An n-gram packed into one integer (21 bits per code point), the sort key of the shared postings."""
+    key = 0
+    for ch in gram:
+        key = (key << 21) | ord(ch)
+    return key
+
+
+def build_postings(values):
+    """
+    (grams, offsets, rows) arrays: the sorted distinct gram keys of `values`,
+    and for grams[i] the ascending row positions rows[offsets[i]:offsets[i + 1]].
+    """
+    keys, rows = array('Q'), array('I')
+    for pos, v in enumerate(values):
+        for g in ngrams(v):
+            keys.append(gram_key(g))
+            rows.append(pos)
+    keys = np.frombuffer(keys, dtype=np.uint64) if keys else np.zeros(0, dtype=np.uint64)
+    rows = np.frombuffer(rows, dtype=np.uint32) if rows else np.zeros(0, dtype=np.uint32)
+    order = np.argsort(keys, kind='stable')  # stable: rows stay ascending within a gram
+    keys, rows = keys[order], rows[order]
+    grams, starts = np.unique(keys, return_index=True)
+    return grams, np.append(starts, len(keys)).astype(np.int64), rows
+
+
+class _Lock:
+    """Exclusive flock on SHARED_DIR/.lock, so concurrently starting workers publish once."""
+
+    def __init__(self, shared_dir):
+        self.path = os.path.join(shared_dir, ".lock")
+
+    def __enter__(self):
+        self.f = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.f, fcntl.LOCK_UN)
+        self.f.close()
+        return False
+
+
+def read_pointer(shared_dir=SHARED_DIR):
+    try:
+        with open(os.path.join(shared_dir, POINTER), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pointer_mtime(shared_dir=SHARED_DIR):
+    try:
+        return os.stat(os.path.join(shared_dir, POINTER)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def publish(frames, version, search_columns, shared_dir=SHARED_DIR, derived=None):
+    """
+    Write `frames` ({name: DataFrame or None}) as a new generation and point
+    CURRENT at it. `search_columns` ({name: [column, ...]}) get a lowercased
+    copy stored alongside for the lookup indexes; `derived` ({name: object})
+    is pickled into the generation for load_derived().
+    """
+    if pa is None:
+        raise RuntimeError("shared datasets need pyarrow")
+    generation = f"gen-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{version}"
+    gen_dir = os.path.join(shared_dir, generation)
+    os.makedirs(gen_dir)
+    datasets = {}
+    for name, df in frames.items():
+        if df is None:
+            continue
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        cols = [c for c in search_columns.get(name, ()) if c in df.columns]
+        postings = {}
+        for i, col in enumerate(cols):
+            values = lowered(df[col])
+            table = table.append_column(LC_PREFIX + col, pa.array(values, type=pa.string()))
+            postings[col] = f"{name}.postings{i}"
+            for part, arr in zip(POSTING_PARTS, build_postings(values)):
+                np.save(os.path.join(gen_dir, f"{postings[col]}.{part}.npy"), arr)
+        path = os.path.join(gen_dir, f"{name}.arrow")
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        datasets[name] = {'file': f"{name}.arrow", 'rows': len(df), 'search': cols, 'postings': postings}
+    for name, obj in (derived or {}).items():
+        with open(os.path.join(gen_dir, f"{name}.pkl"), 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    pointer = {'generation': generation, 'version': version, 'datasets': datasets,
+               'derived': sorted(derived or ()),
+               'published': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    tmp = os.path.join(shared_dir, POINTER + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp, os.path.join(shared_dir, POINTER))
+    _prune(shared_dir)
+    return pointer
+
+
+def _prune(shared_dir):
+    # mapped files stay valid after unlink, so only brand-new attaches need the previous generation
+    gens = sorted((d for d in os.listdir(shared_dir) if d.startswith("gen-")),
+                  key=lambda d: os.stat(os.path.join(shared_dir, d)).st_mtime_ns)
+    for d in gens[:-KEEP_GENERATIONS]:
+        shutil.rmtree(os.path.join(shared_dir, d), ignore_errors=True)
+
+
+def ensure_published(version, load, shared_dir=SHARED_DIR, force=False):
+    """
+    Pointer of the generation for `version`. If none is published yet (or
+    `force`), `load()` -> (frames, search_columns, derived) is called and
+    published; only one process does so, the others wait on the lock and reuse it.
+    """
+    ptr = read_pointer(shared_dir)
+    if not force and ptr and ptr.get('version') == version:
+        return ptr
+    os.makedirs(shared_dir, exist_ok=True)
+    with _Lock(shared_dir):
+        ptr = read_pointer(shared_dir)
+        if not force and ptr and ptr.get('version') == version:
+            return ptr
+        frames, search_columns, derived = load()
+        return publish(frames, version, search_columns, shared_dir, derived=derived)
+
+
+# ----------------------------
+# Attaching
+# ----------------------------
+class SharedTable:
+    """One memory-mapped dataset of a generation."""
+
+    def __init__(self, path, postings=None):
+        # read_all() over a memory map references the mapped buffers, nothing is copied
+        self.table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        self.postings_files = postings or {}  # column -> path prefix of its posting arrays
+        self.columns = [c for c in self.table.column_names if not c.startswith(LC_PREFIX)]
+        self.data = self.table.select(self.columns)
+        # Arrow-backed DataFrame over the same buffers (for columns / len / load-time builds)
+        self.frame = self.data.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def lowered(self, col):
+        return self.table.column(LC_PREFIX + col)
+
+    def postings(self, col):
+        """Memory-mapped (grams, offsets, rows) of `col`, or None for a generation published without them."""
+        prefix = self.postings_files.get(col)
+        if prefix is None:
+            return None
+        return tuple(np.load(f"{prefix}.{part}.npy", mmap_mode='r') for part in POSTING_PARTS)
+
+    def rows(self, positions):
+        """Rows at `positions` as an ordinary DataFrame, identical to df.iloc[positions] of the CSV load."""
+        positions = list(positions)
+        df = table_to_frame(self.data.take(pa.array(positions, type=pa.int64())))
+        df.index = pd.Index(positions, dtype=np.int64)
+        return df
+
+
+def attach(pointer, shared_dir=SHARED_DIR):
+    gen_dir = os.path.join(shared_dir, pointer['generation'])
+    return {name: SharedTable(os.path.join(gen_dir, meta['file']),
+                              postings={col: os.path.join(gen_dir, prefix)
+                                        for col, prefix in meta.get('postings', {}).items()})
+            for name, meta in pointer['datasets'].items()}
+
+
+def load_derived(pointer, name, shared_dir=SHARED_DIR):
+    """A structure the publisher stored with the generation, or None if it has none."""
+    if name not in pointer.get('derived', ()):
+        return None
+    try:
+        with open(os.path.join(shared_dir, pointer['generation'], f"{name}.pkl"), 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"[!] Could not load shared {name}:", e)
+        return None
+
+
+class ArrowColumnIndex:
+    """
+    ColumnIndex over a shared lowercased column and its shared n-gram
+    postings: candidates come from the mapped posting lists and are confirmed
+    with Arrow compute kernels over the mapped strings. Without postings (or
+    for queries shorter than an n-gram) the kernel scans the whole column.
+    """
+
+    def __init__(self, values, name=None, postings=None):
+        self.values = values
+        self.name = name
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.values)
+
+    def _positions(self, mask):
+        return set(np.flatnonzero(mask.to_numpy(zero_copy_only=False)).tolist())
+
+    def _candidates(self, q):
+        """Ascending row positions holding every n-gram of `q`."""
+        grams, offsets, rows = self.postings
+        lists = []
+        for g in ngrams(q):
+            key = gram_key(g)
+            i = int(np.searchsorted(grams, key))
+            if i == len(grams) or grams[i] != key:
+                return np.zeros(0, dtype=np.uint32)
+            lists.append(rows[offsets[i]:offsets[i + 1]])
+        lists.sort(key=len)
+        found = lists[0]
+        for ids in lists[1:]:
+            # binary-search the (short) candidates in each longer sorted list
+            at = np.minimum(np.searchsorted(ids, found), len(ids) - 1)
+            found = found[ids[at] == found]
+            if not len(found):
+                break
+        return found
+
+    def contains(self, q):
+        # literal substring (as ColumnIndex)
+        if self.postings is None or len(q) < NGRAM:
+            metrics.inc('profiler_rows_scanned_total', len(self.values), dataset=self.name)
+            return self._positions(pc.match_substring(self.values, q))
+        found = self._candidates(q)
+        metrics.inc('profiler_rows_scanned_total', len(found), dataset=self.name)
+        if not len(found):
+            return set()
+        mask = pc.match_substring(self.values.take(pa.array(found, type=pa.uint32())), q)
+        return set(np.asarray(found)[mask.to_numpy(zero_copy_only=False)].tolist())
+
+    def contains_many(self, queries):
+        return [self.contains(q) for q in queries]
+
+    def equals(self, q):
+        return self._positions(pc.equal(self.values, q))
+
+
+class ArrowFrameIndex(FrameIndex):
+    """FrameIndex over a SharedTable; rows() materializes only the requested rows."""
+
+    def __init__(self, shared, columns, name=None):
+        self.shared = shared
+        self.df = shared.frame
+        self.name = name
+        self.columns = {}
+        for col in columns:
+            if col is not None and col in shared.columns:
+                self.columns[col] = ArrowColumnIndex(shared.lowered(col), name=name, postings=shared.postings(col))
+
+    def rows(self, positions):
+        return self.shared.rows(positions)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Shared dataset generations")
+    parser.add_argument("command", choices=("publish", "status"))
+    parser.add_argument("--force", action="store_true", help="publish even if the CSVs are unchanged")
+    args = parser.parse_args(argv)
+    if args.command == "publish":
+        os.environ["PROFILER_SHARED_DATA"] = "1"
+        import app
+        if args.force:
+            ptr = app.publish_datasets()
+        else:
+            app.get_datasets()  # attaching publishes the current CSVs if no generation matches them
+            ptr = read_pointer()
+    else:
+        ptr = read_pointer()
+    if not ptr:
+        print(f"[!] Nothing published in {SHARED_DIR}")
+        return
+    print(f"[+] {SHARED_DIR}/{ptr['generation']} (version {ptr['version']}, {ptr['published']})")
+    for name, meta in ptr['datasets'].items():
+        print(f"    {name:<10} {meta['rows']:>10} rows  search columns: {', '.join(meta['search']) or '-'}")
+    if ptr.get('derived'):
+        print(f"    derived: {', '.join(ptr['derived'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Columnar (Arrow/Feather) snapshots of the CSV datasets.
+#
+# Parsing the CSVs dominates start-up once the feeds reach millions of rows, so
+# the first load writes a typed, uncompressed Feather file next to the data and
+# later loads memory-map it instead. The snapshot records the CSV's mtime, size
+# and SHA-256; if the CSV changes it is re-read and the snapshot regenerated.
+#
+#   python -m utils.snapshot          (from backend/) converts every dataset up front
+import hashlib, json, os
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are an optimisation; CSV loading still works
+    pa = None
+    feather = None
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+SNAPSHOT_DIR = os.path.join(os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data"), "snapshots")
+SNAPSHOT_VERSION = 2  # 2: identifier columns parsed as text
+
+# low-cardinality text columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = ("platform", "risk_level", "activity_type", "country", "breach_source")
+CATEGORICAL_MAX_RATIO = 0.5  # only if distinct values <= 50% of rows
+
+
+def snapshot_paths(csv_path):
+    name = os.path.basename(csv_path) + ".arrow"
+    path = os.path.join(SNAPSHOT_DIR, name)
+    return path, path + ".json"
+
+
+def file_sha256(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def apply_dtypes(df):
+    """Convert the known low-cardinality columns to categoricals (in place)."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype == object and len(df):
+            if df[col].nunique(dropna=True) <= CATEGORICAL_MAX_RATIO * len(df):
+                df[col] = df[col].astype('category')
+    return df
+
+
+def write_snapshot(df, csv_path, sha256=None):
+    """Write `df` as the snapshot of `csv_path`. Returns False if it cannot be stored."""
+    if feather is None:
+        return False
+    path, meta_path = snapshot_paths(csv_path)
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    st = os.stat(csv_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        # uncompressed so the file can be memory-mapped without decoding
+        feather.write_feather(df, tmp, compression='uncompressed')
+    except Exception as e:
+        print(f"[!] Could not snapshot {csv_path}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+    os.replace(tmp, path)
+    _write_meta(meta_path, {
+        'version': SNAPSHOT_VERSION,
+        'csv_mtime_ns': st.st_mtime_ns,
+        'csv_size': st.st_size,
+        'csv_sha256': sha256 or file_sha256(csv_path),
+        'rows': len(df),
+    })
+    return True
+
+
+def table_to_frame(table):
+    """Arrow table -> DataFrame with the same dtypes / missing values as the CSV load."""
+    df = table.to_pandas()
+    # Arrow hands back None for missing strings where read_csv produced NaN;
+    # restore NaN so astype(str) and to_dict() behave exactly as before
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].mask(df[col].isna(), np.nan)
+    return df
+
+
+def read_snapshot(path):
+    return table_to_frame(feather.read_table(path, memory_map=True))
+
+
+def snapshot_is_current(csv_path):
+    """(current, csv_sha256) for the snapshot of `csv_path`; hashes only when mtime/size moved."""
+    path, meta_path = snapshot_paths(csv_path)
+    meta = _read_meta(meta_path)
+    if not meta or meta.get('version') != SNAPSHOT_VERSION or not os.path.exists(path):
+        return False, None
+    st = os.stat(csv_path)
+    if meta.get('csv_mtime_ns') == st.st_mtime_ns and meta.get('csv_size') == st.st_size:
+        return True, meta.get('csv_sha256')
+    sha = file_sha256(csv_path)
+    if sha != meta.get('csv_sha256'):
+        return False, sha
+    # touched but unchanged: remember the new mtime so we skip hashing next time
+    meta['csv_mtime_ns'] = st.st_mtime_ns
+    meta['csv_size'] = st.st_size
+    _write_meta(meta_path, meta)
+    return True, sha
+
+
+def load_dataset(csv_path, reader):
+    """
+    Load `csv_path` from its snapshot when it is current, otherwise parse it with
+    `reader(csv_path)` and (re)write the snapshot for next time.
+    """
+    sha = None
+    if feather is not None:
+        current, sha = snapshot_is_current(csv_path)
+        if current:
+            try:
+                return read_snapshot(snapshot_paths(csv_path)[0])
+            except Exception as e:
+                print(f"[!] Snapshot of {csv_path} unreadable, re-reading CSV: {e}")
+    df = apply_dtypes(reader(csv_path))
+    write_snapshot(df, csv_path, sha256=sha)
+    return df
+
+
+if __name__ == "__main__":
+    import app
+    app.get_datasets()  # loading the datasets (re)builds any stale snapshot
+
+    for csv_path in (app.KAGGLE_PATH, app.PERSON_PATH, app.PERSON_DUMMY_PATH, app.ACTOR_PATH):
+        path, _ = snapshot_paths(csv_path)
+        if os.path.exists(path):
+            print(f"[+] {os.path.basename(csv_path)} -> {path} ({os.path.getsize(path)} bytes)")
@@ -0,0 +1,392 @@
+# On-disk dataset backend for corpora larger than RAM (PROFILER_BACKEND=sqlite).
+#
+# Every dataset is streamed from its CSV in chunks into one SQLite file
+# (data/datasets.sqlite):
+#
+#   <name>        pos INTEGER PRIMARY KEY + one column per CSV column, values as parsed
+#   <name>__lc    pos + the lowercased search columns (the strings ColumnIndex compares),
+#                 each with B-tree indexes for exact email / username lookups (as stored
+#                 and whitespace-stripped, the latter for rollups)
+#   <name>__fts   FTS5 trigram index over <name>__lc, for substring lookups
+#
+# Lookups go through StoreFrameIndex, which has the FrameIndex interface:
+# substring queries of 3+ characters (matched literally, '.' included) are
+# answered by the trigram index and confirmed with instr(); 1-2 character
+# queries scan the lowercase table only. Matching rows are fetched by primary key and rebuilt with the
+# dtypes of the CSV parse, so build_profile emits the same records as with
+# in-memory DataFrames. Only the pages holding matches are read. Rollups are
+# answered from the store as well (StoreRollups); the fuzzy handle index and the
+# dataset part of the entity graph would have to hold every row in memory, so
+# they are not built in this mode.
+#
+# Several workers may start against a changed CSV at once: writers wait up to
+# BUSY_TIMEOUT seconds for the write lock, and a build that finds the dataset
+# already stored for its signature once it holds the lock reuses it.
+#
+#   python -m utils.sqlite_store build     (re)build datasets whose CSV changed
+#   python -m utils.sqlite_store status    show what the store holds
+#   python -m utils.sqlite_store check [q ...]   compare profiles against the pandas path
+import json, os, sqlite3, sys, threading, time
+
+import numpy as np
+import pandas as pd
+
+from utils import metrics
+from utils.dataset_index import NGRAM, FrameIndex, lowered
+from utils.rollups import Rollups
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.path.join(os.environ.get("PROFILER_DATA_DIR") or os.path.join(BASE_DIR, "data"), "datasets.sqlite")
+CHUNK_ROWS = 50000  # rows per CSV chunk when building / per batch when streaming a table
+MAX_PARAMS = 900    # bound parameters per IN (...) query
+BUSY_TIMEOUT = float(os.environ.get("PROFILER_STORE_BUSY_TIMEOUT", "600"))  # seconds a writer waits for another build
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error), DDL included."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, *exc):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def merge_dtype(a, b):
+    """dtype of a column after concatenating chunks parsed as `a` and `b`."""
+    if a is None or a == b:
+        return b
+    if a in ('int64', 'float64') and b in ('int64', 'float64'):
+        return 'float64'
+    return 'object'
+
+
+def stripped(col):
+    """SQL for str.strip() of a lowercased column (ASCII whitespace), as indexed and queried."""
+    return f"trim({col}, ' ' || char(9, 10, 11, 12, 13))"
+
+
+def sql_values(df):
+    """Rows of `df` as Python values for sqlite3 (missing -> None)."""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+class SqliteStore:
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def connect(self):
+        """Per-thread read-only connection (stages run on several threads)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.db = db
+        return db
+
+    def _writer(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, isolation_level=None, timeout=BUSY_TIMEOUT)  # transactions are explicit
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS datasets (name TEXT PRIMARY KEY, meta TEXT NOT NULL)")
+        return db
+
+    def meta(self, name=None):
+        """Metadata of one dataset (None if absent), or {name: meta} of all."""
+        if not os.path.exists(self.path):
+            return None if name else {}
+        try:
+            rows = self.connect().execute("SELECT name, meta FROM datasets").fetchall()
+        except sqlite3.Error:
+            return None if name else {}
+        metas = {n: json.loads(m) for n, m in rows}
+        return metas.get(name) if name else metas
+
+    def build(self, name, chunks, columns_for, signature):
+        """
+        Replace dataset `name` with the rows of `chunks` (DataFrames in file
+        order). `columns_for(df)` -> (search columns, exact columns) is called
+        on the first chunk. Readers see the old version until the commit.
+        If another process stored `signature` while this one waited for the
+        write lock, its result is kept and returned.
+        """
+        start = time.perf_counter()
+        db = self._writer()
+        try:
+            with _transaction(db):
+                row = db.execute("SELECT meta FROM datasets WHERE name = ?", (name,)).fetchone()
+                if row and json.loads(row[0]).get('signature') == signature:
+                    print(f"[*] {name} is already stored for this CSV")
+                    return json.loads(row[0])
+                self._drop(db, name)
+                columns, dtypes, search, pos = None, [], [], 0
+                for df in chunks:
+                    if columns is None:
+                        columns = [str(c) for c in df.columns]
+                        dtypes = [None] * len(columns)
+                        cols, _ = columns_for(df)
+                        search = [c for c in cols if c in df.columns]
+                        data_cols = ", ".join(f"c{i}" for i in range(len(columns)))
+                        db.execute(f'CREATE TABLE "{name}" (pos INTEGER PRIMARY KEY, {data_cols})')
+                        lc_cols = "".join(f", s{i} TEXT" for i in range(len(search)))
+                        db.execute(f'CREATE TABLE "{name}__lc" (pos INTEGER PRIMARY KEY{lc_cols})')
+                    dtypes = [merge_dtype(a, str(b)) for a, b in zip(dtypes, df.dtypes)]
+                    positions = range(pos, pos + len(df))
+                    marks = ", ".join("?" * (len(columns) + 1))
+                    db.executemany(f'INSERT INTO "{name}" VALUES ({marks})',
+                                   ((p, *row) for p, row in zip(positions, sql_values(df))))
+                    if search:
+                        lc = [lowered(df[c]) for c in search]
+                        db.executemany(f'INSERT INTO "{name}__lc" VALUES ({", ".join("?" * (len(search) + 1))})',
+                                       zip(positions, *lc))
+                    pos += len(df)
+                if columns is None:
+                    return None  # empty file: nothing to serve
+                if search:
+                    fts_cols = ", ".join(f"s{i}" for i in range(len(search)))
+                    db.execute(f'CREATE VIRTUAL TABLE "{name}__fts" USING fts5({fts_cols}, '
+                               f"tokenize='trigram', content='{name}__lc', content_rowid='pos')")
+                    db.execute(f'INSERT INTO "{name}__fts"("{name}__fts") VALUES (\'rebuild\')')
+                    for i in range(len(search)):
+                        db.execute(f'CREATE INDEX "{name}__lc_s{i}" ON "{name}__lc"(s{i})')
+                        db.execute(f'CREATE INDEX "{name}__lc_t{i}" ON "{name}__lc"({stripped(f"s{i}")})')
+                meta = {'columns': columns, 'dtypes': [d or 'object' for d in dtypes], 'rows': pos,
+                        'search': search, 'signature': signature,
+                        'built': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+                db.execute("INSERT INTO datasets (name, meta) VALUES (?, ?)", (name, json.dumps(meta)))
+        finally:
+            db.close()
+        metrics.set_gauge('profiler_dataset_load_seconds', round(time.perf_counter() - start, 6), dataset=name)
+        print(f"[+] Stored {name}: {pos} rows in {self.path} ({time.perf_counter() - start:.1f}s)")
+        return meta
+
+    @staticmethod
+    def _drop(db, name):
+        for suffix in ("__fts", "__lc", ""):
+            db.execute(f'DROP TABLE IF EXISTS "{name}{suffix}"')
+        db.execute("DELETE FROM datasets WHERE name = ?", (name,))
+
+    def drop(self, name):
+        if not os.path.exists(self.path):
+            return
+        db = self._writer()
+        try:
+            with _transaction(db):
+                self._drop(db, name)
+        finally:
+            db.close()
+
+    def table(self, name):
+        meta = self.meta(name)
+        return StoreTable(self, name, meta) if meta else None
+
+
+class StoreTable:
+    """One dataset of the store; rows are read on demand."""
+
+    def __init__(self, store, name, meta):
+        self.store = store
+        self.name = name
+        self.columns = meta['columns']
+        self.dtypes = meta['dtypes']
+        self.search = meta['search']
+        self.n_rows = meta['rows']
+        # no rows, but the columns / dtypes for code that inspects the dataset's shape
+        self.frame = self._frame([])
+
+    def __len__(self):
+        return self.n_rows
+
+    def _frame(self, records):
+        """DataFrame (index = row positions) with the dtypes of the CSV parse."""
+        index = pd.Index([r[0] for r in records], dtype=np.int64)
+        if records:
+            df = pd.DataFrame.from_records([r[1:] for r in records], columns=self.columns, index=index)
+        else:
+            # from_records cannot build an empty frame with an explicit index
+            df = pd.DataFrame({c: pd.Series(dtype=object) for c in self.columns}, index=index)
+        for col, dtype in zip(self.columns, self.dtypes):
+            if dtype == 'object':
+                # read_csv leaves NaN (not None) for missing text
+                df[col] = df[col].astype(object).mask(df[col].isna(), np.nan)
+            else:
+                df[col] = df[col].astype(dtype)
+        return df
+
+    def rows(self, positions):
+        """Rows at `positions` (ascending), like df.iloc[positions] of the in-memory load."""
+        positions = list(positions)
+        db = self.store.connect()
+        records = []
+        for i in range(0, len(positions), MAX_PARAMS):
+            batch = positions[i:i + MAX_PARAMS]
+            records.extend(db.execute(
+                f'SELECT * FROM "{self.name}" WHERE pos IN ({", ".join("?" * len(batch))}) ORDER BY pos', batch))
+        return self._frame(records)
+
+    def chunks(self, start=0, size=CHUNK_ROWS):
+        """Rows from position `start` on, `size` at a time."""
+        db = self.store.connect()
+        while True:
+            records = db.execute(f'SELECT * FROM "{self.name}" WHERE pos >= ? ORDER BY pos LIMIT ?',
+                                 (start, size)).fetchall()
+            if not records:
+                return
+            yield self._frame(records)
+            start = records[-1][0] + 1
+
+
+class StoreRollups:
+    """
+    Rollups read from the store: an entity's rows are found through the
+    exact-match index of its key column and folded when it is requested, so
+    nothing is held in memory. `keys` is {dataset: {kind: key column}}.
+    """
+
+    def __init__(self, indexes, keys):
+        self.indexes = indexes
+        self.keys = keys
+
+    def get(self, kind, value):
+        key = str(value).strip().lower()
+        r = Rollups()
+        for name, keys in self.keys.items():
+            col = keys.get(kind)
+            index = self.indexes.get(name)
+            if index is None or col not in index.columns:
+                continue
+            # keys are stripped like Rollups.add_frame strips them
+            positions = sorted(index.columns[col].equals_stripped(key))
+            if positions:
+                r.add_frame(index.rows(positions), name, {kind: col})
+        return r.get(kind, key)
+
+
+class StoreColumnIndex:
+    """ColumnIndex over one lowercased column of the store."""
+
+    def __init__(self, table, col, name=None):
+        self.table = table
+        self.name = name
+        self.col = f"s{table.search.index(col)}"
+        self.lc = f'"{table.name}__lc"'
+        self.fts = f'"{table.name}__fts"'
+
+    def __len__(self):
+        return len(self.table)
+
+    def _positions(self, sql, params):
+        return {pos for (pos,) in self.table.store.connect().execute(sql, params)}
+
+    def contains(self, q):
+        # literal substring, like ColumnIndex; only 1-2 character queries scan the lowercase table
+        if len(q) < NGRAM:
+            metrics.inc('profiler_rows_scanned_total', len(self), dataset=self.name)
+            return self._positions(f"SELECT pos FROM {self.lc} WHERE instr({self.col}, ?) > 0", (q,))
+        phrase = '"' + q.replace('"', '""') + '"'
+        found = self._positions(
+            f"SELECT l.pos FROM {self.fts} JOIN {self.lc} l ON l.pos = {self.fts}.rowid "
+            f"WHERE {self.fts} MATCH ? AND instr(l.{self.col}, ?) > 0", (f"{self.col} : {phrase}", q))
+        metrics.inc('profiler_rows_scanned_total', len(found), dataset=self.name)
+        return found
+
+    def contains_many(self, queries):
+        return [self.contains(q) for q in queries]
+
+    def equals(self, q):
+        return self._positions(f"SELECT pos FROM {self.lc} WHERE {self.col} = ?", (q,))
+
+    def equals_stripped(self, q):
+        """Rows whose lowercased value, stripped of surrounding whitespace, is `q`."""
+        return self._positions(f"SELECT pos FROM {self.lc} WHERE {stripped(self.col)} = ?", (q,))
+
+
+class StoreFrameIndex(FrameIndex):
+    """FrameIndex over a StoreTable; rows() reads only the requested rows."""
+
+    def __init__(self, table, columns, name=None):
+        self.table = table
+        self.df = table.frame
+        self.name = name
+        self.columns = {}
+        for col in columns:
+            if col is not None and col in table.search:
+                self.columns[col] = StoreColumnIndex(table, col, name=name)
+
+    def rows(self, positions):
+        return self.table.rows(positions)
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def parity_queries(d, limit=3):
+    """Queries drawn from the store: exact emails, handles, short / 2-char and organization substrings."""
+    queries = []
+    for name, cols in (('person', ('email', 'username')), ('actor', ('username', 'email')), ('breaches', None)):
+        table = d.store.get(name)
+        if table is None or not len(table):
+            continue
+        sample = table.rows(range(min(limit, len(table))))
+        for col in cols or table.search:
+            if col in sample.columns:
+                for v in sample[col].dropna().astype(str):
+                    queries += [v, v[:4], v[:2]]
+    return list(dict.fromkeys(q for q in queries if q.strip()))
+
+
+def check(queries):
+    """Build every profile from the pandas datasets and from the store; True if all are identical."""
+    import app
+    from utils.benchmark import DEFAULT_QUERIES
+    memory = app.Datasets(app.load_frames(), app.datasets_signature())
+    disk = app.open_store_datasets()
+    queries = queries or list(DEFAULT_QUERIES.values()) + parity_queries(disk) + ["a.c", "(bank"]
+    failures = 0
+    for q in queries:
+        results = []
+        for d in (memory, disk):
+            try:
+                # fuzzy matching is not served from the store
+                results.append(app.app.json.dumps(app.build_profile(q, concurrent=False, d=d)))
+            except Exception as e:
+                results.append(f"{type(e).__name__}: {e}")
+        if results[0] == results[1]:
+            print(f"[+] {q!r}: identical")
+        else:
+            failures += 1
+            a, b = (json.loads(r) if r.startswith("{") else {'error': r} for r in results)
+            diff = [k for k in dict.fromkeys(list(a) + list(b)) if a.get(k) != b.get(k)]
+            print(f"[!] {q!r}: differs in {', '.join(diff)}")
+    print(f"[*] {len(queries) - failures}/{len(queries)} queries identical")
+    return failures == 0
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="On-disk SQLite/FTS5 dataset store")
+    parser.add_argument("command", choices=("build", "status", "check"))
+    parser.add_argument("queries", nargs="*", help="check: queries to compare (default: drawn from the data)")
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        import app
+        app.open_store_datasets()
+    elif args.command == "check":
+        sys.exit(0 if check(args.queries) else 1)
+    metas = SqliteStore().meta()
+    if not metas:
+        print(f"[!] No datasets stored in {STORE_PATH}")
+        return
+    print(f"[+] {STORE_PATH} ({os.path.getsize(STORE_PATH) / 1e6:,.1f} MB)")
+    for name, meta in metas.items():
+        print(f"    {name:<10} {meta['rows']:>10} rows  search columns: {', '.join(meta['search']) or '-'}  "
+              f"built {meta['built']}")
+
+
+if __name__ == "__main__":
+    main()
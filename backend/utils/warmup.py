@@ -0,0 +1,110 @@
+# Lazily loaded heavy resources (spaCy model, datasets, indexes) and the
+# warm-up that loads them ahead of the first request.
+#
+# A Resource wraps a loader that runs once, on first get() or during
+# warm_up(); concurrent callers wait for the one load instead of repeating it.
+# warm_up() loads independent resources side by side on threads, starting each
+# as soon as the resources it depends on are ready, and status() reports what
+# is loaded for the readiness endpoint. Optional resources (derived structures
+# the requests can serve without) are warmed like the rest but do not gate
+# readiness.
+import threading, time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils import metrics
+
+
+class Resource:
+    def __init__(self, name, loader, requires=(), loaded=None, optional=False):
+        self.name = name
+        self.loader = loader
+        self.requires = tuple(requires)
+        self.optional = optional
+        self._loaded = loaded  # optional callable: already loaded by other means?
+        self._lock = threading.Lock()
+        self._done = False
+        self._value = None
+        self.state = 'pending'  # pending | loading | ready | failed
+        self.error = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self._done or bool(self._loaded and self._loaded())
+
+    def get(self):
+        if self._done:
+            return self._value
+        with self._lock:
+            if not self._done:
+                self.state, self.error = 'loading', None
+                start = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    # left retryable: the next get() loads again
+                    self.state, self.error = 'failed', f"{type(e).__name__}: {e}"
+                    raise
+                self.seconds = round(time.perf_counter() - start, 3)
+                metrics.set_gauge('profiler_warmup_seconds', self.seconds, resource=self.name)
+                self.state = 'ready'
+                self._done = True
+        return self._value
+
+    def status(self):
+        state = 'ready' if self.ready else self.state
+        return {'state': state, 'seconds': self.seconds, 'error': self.error}
+
+
+class Registry:
+    def __init__(self):
+        self.resources = {}
+        self._thread = None
+
+    def add(self, name, loader, requires=(), loaded=None, optional=False):
+        res = self.resources[name] = Resource(name, loader, requires, loaded, optional)
+        return res
+
+    def __getitem__(self, name):
+        return self.resources[name]
+
+    @property
+    def ready(self):
+        return all(r.ready for r in self.resources.values() if not r.optional)
+
+    def status(self, optional=None):
+        """Per-resource state; optional=True/False restricts it to those resources."""
+        return {name: r.status() for name, r in self.resources.items()
+                if optional is None or r.optional == optional}
+
+    def warm_up(self, workers=4):
+        """Load every resource, independent ones concurrently; returns {name: error} for failures."""
+        start = time.perf_counter()
+        futures, errors = {}, {}
+
+        def load(res):
+            for dep in res.requires:
+                if futures[dep].exception() is not None:
+                    res.state, res.error = 'failed', f"{dep} failed to load"
+                    raise RuntimeError(res.error)
+            return res.get()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup") as pool:
+            # submission follows declaration order, so dependencies are always queued first
+            for name, res in self.resources.items():
+                futures[name] = pool.submit(load, res)
+            wait(futures.values())
+        for name, fut in futures.items():
+            if fut.exception() is not None:
+                errors[name] = fut.exception()
+                print(f"[!] Warm-up: {name} failed:", fut.exception())
+        print(f"[+] Warm-up finished in {time.perf_counter() - start:.2f}s"
+              + (f" ({len(errors)} failed)" if errors else ""))
+        return errors
+
+    def preload(self):
+        """warm_up() on a daemon thread (once); requests meanwhile load on demand or wait for it."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.warm_up, name="preload", daemon=True)
+            self._thread.start()
+        return self._thread